@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+# The process umask, read once: os.umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def replacement_mode(path):
+    """
+    Return the permission bits for a file about to replace path: those of the
+    current file if there is one, otherwise what open() would have created.
+    mkstemp creates its files 0600, which would hide the data from other users.
+    """
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write(path, data, prefix=None, sync=True):
+    """
+    Replace a file with new bytes so readers see either the old or the new file,
+    never a partial one: write a temp file in the same directory, flush it to disk
+    unless sync is off, then rename it over the target. The target keeps its
+    permissions. data is bytes or an iterable of byte chunks; the temp file is
+    named with prefix, by default a dot and the target's name.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if prefix is None:
+        prefix = f".{os.path.basename(path)}-"
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=prefix)
+    try:
+        os.fchmod(fd, replacement_mode(path))
+        with os.fdopen(fd, "wb") as f:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                f.write(data)
+            else:
+                f.writelines(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
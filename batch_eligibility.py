@@ -0,0 +1,171 @@
+import csv
+import json
+import re
+
+# Students are evaluated this many at a time, one bit per student in each course column
+BATCH_CHUNK_SIZE = 4096
+
+# Course IDs within one CSV cell may be separated by spaces or semicolons
+_COURSE_SEPARATOR = re.compile(r"[\s;]+")
+_SET_BIT = re.compile("1")
+CSV_HEADERS = {"id", "student", "student_id"}
+
+
+def _bit_positions(mask):
+    """
+    Return the positions of the set bits of a wide mask, lowest first.
+    """
+    return [match.start() for match in _SET_BIT.finditer(bin(mask)[:1:-1])]
+
+
+def read_students_jsonl(lines):
+    """
+    Yield (student, completed_courses) from JSON lines. Each line is either an object
+    with "student" (or "id") and "completed_courses", or a bare list of course IDs,
+    in which case the line number identifies the student. Unreadable lines yield
+    (line number, None).
+    """
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        if isinstance(record, list):
+            yield line_number, [str(course) for course in record]
+        elif isinstance(record, dict):
+            student = record.get("student", record.get("id", line_number))
+            yield student, [str(course) for course in record.get("completed_courses", [])]
+        else:
+            yield line_number, None
+
+
+def read_students_csv(lines):
+    """
+    Yield (student, completed_courses) from CSV rows of a student ID followed by
+    completed course IDs. A first row headed "student" or "id" is skipped.
+    """
+    for row_number, row in enumerate(csv.reader(lines)):
+        if not row or not row[0].strip():
+            continue
+        if row_number == 0 and row[0].strip().lower() in CSV_HEADERS:
+            continue
+        courses = [course for cell in row[1:] for course in _COURSE_SEPARATOR.split(cell) if course]
+        yield row[0].strip(), courses
+
+
+def evaluate_chunk(course_graph, chunk, unmet=False):
+    """
+    Evaluate a list of (student, completed_courses) together. Each course becomes a
+    column bitmask over the students in the chunk, so eligibility costs a few big-int
+    ANDs per prerequisite edge for the whole chunk. Returns one result dict per student.
+    With unmet set, each result also maps every course the student cannot take yet
+    to its unmet prerequisites; that map is large for a whole catalog and slow to build.
+    """
+    index = course_graph.index
+    ids = course_graph.ids
+    byte_count = (len(chunk) + 7) // 8
+    columns = {}
+    unknown = {}
+    for position, (_, courses) in enumerate(chunk):
+        if courses is None:
+            continue
+        byte, bit = position >> 3, 1 << (position & 7)
+        for course in courses:
+            node = index.get(course)
+            if node is None:
+                unknown.setdefault(position, []).append(course)
+                continue
+            column = columns.get(node)
+            if column is None:
+                column = columns[node] = bytearray(byte_count)
+            column[byte] |= bit
+
+    completed = [0] * len(course_graph)
+    for node, column in columns.items():
+        completed[node] = int.from_bytes(column, "little")
+    all_students = (1 << len(chunk)) - 1
+    satisfied = course_graph.satisfied_columns(completed)
+    eligible = course_graph.next_columns(completed, all_students, satisfied)
+
+    next_courses = [[] for _ in chunk]
+    for node, column in enumerate(eligible):
+        if column:
+            course_id = ids[node]
+            for position in _bit_positions(column):
+                next_courses[position].append(course_id)
+
+    # Unmet prerequisites of the courses a student has not completed: one AND per edge
+    # for the whole chunk. Counting them per student with the "one" and "two or more"
+    # columns finds the courses one prerequisite short without listing the others.
+    missing_one = [{} for _ in chunk]
+    unmet_maps = [{} for _ in chunk] if unmet else None
+    for node in range(course_graph.course_count):
+        prereqs = course_graph.prerequisites(node)
+        if not prereqs:
+            continue
+        open_students = all_students & ~completed[node]
+        if not open_students:
+            continue
+        course_id = ids[node]
+        unmet_columns = [open_students & ~satisfied[prereq] for prereq in prereqs]
+        one = two = 0
+        for column in unmet_columns:
+            two |= one & column
+            one |= column
+        only = one & ~two
+        for prereq, column in zip(prereqs, unmet_columns):
+            if column & only:
+                for position in _bit_positions(column & only):
+                    missing_one[position][course_id] = ids[prereq]
+            if unmet and column:
+                for position in _bit_positions(column):
+                    unmet_maps[position].setdefault(course_id, []).append(ids[prereq])
+
+    results = []
+    for position, (student, courses) in enumerate(chunk):
+        if courses is None:
+            results.append({"student": student, "error": "could not parse record"})
+            continue
+        result = {
+            "student": student,
+            "next": next_courses[position],
+            "missing_one": missing_one[position],
+        }
+        if unmet:
+            result["unmet"] = unmet_maps[position]
+        if position in unknown:
+            result["unknown"] = unknown[position]
+        results.append(result)
+    return results
+
+
+def evaluate_students(course_graph, students, chunk_size=BATCH_CHUNK_SIZE, unmet=False):
+    """
+    Evaluate (student, completed_courses) pairs in chunks, yielding result dicts
+    as each chunk finishes so results can be streamed. unmet is passed to evaluate_chunk.
+    """
+    chunk = []
+    for student in students:
+        chunk.append(student)
+        if len(chunk) == chunk_size:
+            yield from evaluate_chunk(course_graph, chunk, unmet)
+            chunk = []
+    if chunk:
+        yield from evaluate_chunk(course_graph, chunk, unmet)
+
+
+def results_jsonl(results):
+    """
+    Serialize results as JSON lines, one string per chunk of results.
+    """
+    lines = []
+    for result in results:
+        lines.append(json.dumps(result, ensure_ascii=False))
+        if len(lines) == BATCH_CHUNK_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
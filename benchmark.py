@@ -0,0 +1,295 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from course_catalog import build_catalog, use_catalog_files
+from course_labels import CourseLabels, wrap_text
+from course_pages import PARSER_BACKENDS
+from course_stream import ijson_backend, iter_courses
+from graph_core import CourseGraph
+from graph_layout import capture_layout
+from overlap_index import OverlapIndex
+from use3party_withoverlap import build_course_graph, identify_next_courses, incorporate_overlapping_courses
+
+RESULTS_FILE = "benchmark_results.json"
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+# Graphviz layout and end-to-end renders are only run up to this many courses
+DEFAULT_RENDER_MAX = 1000
+# Fixture course pages parsed by each parser backend
+PARSE_PAGES = 50
+
+HEBREW_WORDS = (
+    "מבוא", "אלגברה", "לינארית", "חשבון", "אינפיניטסימלי", "מתמטיקה", "בדידה", "מבני", "נתונים",
+    "אלגוריתמים", "תורת", "הקבוצות", "קומבינטוריקה", "הגרפים", "מערכות", "הפעלה", "רשתות",
+    "תקשורת", "מחשבים", "למדעי", "המחשב", "הסתברות", "סטטיסטיקה", "לוגיקה", "חישוביות",
+    "קומפילציה", "בינה", "מלאכותית", "למידה", "חישובית", "גרפיקה", "אבטחת", "מידע", "סדנה",
+)
+
+
+def synthetic_catalog(course_count, seed=0):
+    """
+    Generate course data and overlapping groups shaped like the scraped catalog:
+    Hebrew names ending in U+200F, prerequisites mostly on recent courses, some
+    prerequisites outside the catalog, and overlapping groups with repeats.
+    """
+    rng = random.Random(seed)
+    ids = [str(20000 + i) for i in range(course_count)]
+    external = [str(10000 + i) for i in range(max(1, course_count // 20))]
+
+    course_data = {}
+    for i, course_id in enumerate(ids):
+        words = " ".join(rng.choice(HEBREW_WORDS) for _ in range(rng.randint(2, 7)))
+        prerequisites = []
+        for _ in range(rng.choice((0, 0, 1, 1, 2, 2, 3, 4))):
+            if i and rng.random() < 0.9:
+                prereq = ids[rng.randrange(max(0, i - 50), i)]
+            else:
+                prereq = rng.choice(external)
+            if prereq not in prerequisites:
+                prerequisites.append(prereq)
+        course_data[course_id] = {
+            "name": f"{course_id} {words}\u200f{rng.randint(1, 3)}",
+            "prerequisites": prerequisites,
+        }
+
+    groups = []
+    for _ in range(course_count // 2):
+        if groups and rng.random() < 0.3:
+            groups.append(list(rng.choice(groups)))
+            continue
+        start = rng.randrange(course_count)
+        members = {ids[min(course_count - 1, start + rng.randint(0, 5))] for _ in range(rng.randint(2, 3))}
+        if rng.random() < 0.3:
+            members.add(rng.choice(external))
+        members.add(ids[start])
+        groups.append(sorted(members))
+    return course_data, groups
+
+
+def course_page_html(course_id, name, prerequisites, rng):
+    """
+    Build a course page shaped like the Open University pages: scripts and
+    navigation before the title, a prerequisite paragraph, then a long body.
+    """
+    navigation = "".join(
+        f'<li><a href="/courses/{rng.randint(10000, 99999)}.htm">{rng.choice(HEBREW_WORDS)}</a></li>'
+        for _ in range(80)
+    )
+    prereq_links = ", ".join(
+        f'<a href="/courses/{prereq}.htm">{prereq}</a>' for prereq in prerequisites
+    )
+    paragraphs = "".join(
+        f"<p>{' '.join(rng.choice(HEBREW_WORDS) for _ in range(60))}</p>" for _ in range(30)
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>קורס</title>"
+        "<script>var settings = {menu: true};</script><style>body { direction: rtl; }</style>"
+        f"</head><body><nav><ul>{navigation}</ul></nav><main>"
+        f'<h1 id="course_title">{name}</h1>'
+        f"<div class='details'><p>ידע קודם דרוש: {prereq_links}</p></div>"
+        f"<div class='content'>{paragraphs}</div></main><footer><br><img src='logo.png'></footer>"
+        "</body></html>"
+    )
+
+
+def measure(function, min_time=0.2, max_runs=50):
+    """
+    Call function repeatedly for at least min_time seconds (always at least once)
+    and return timing statistics in seconds per call.
+    """
+    times = []
+    start = time.perf_counter()
+    while not times or (time.perf_counter() - start < min_time and len(times) < max_runs):
+        began = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - began)
+    return {
+        "runs": len(times),
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+    }
+
+
+def random_completed(course_data, rng, count=10):
+    ids = list(course_data)
+    return rng.sample(ids, min(count, len(ids)))
+
+
+def bench_parse(page_count, rng, record):
+    course_data, _ = synthetic_catalog(page_count, seed=page_count)
+    pages = [
+        course_page_html(course_id, details["name"], details["prerequisites"], rng)
+        for course_id, details in course_data.items()
+    ]
+    for backend, parse in PARSER_BACKENDS.items():
+        # Reported per page
+        record(f"parse/{backend}", page_count, measure(lambda: [parse(page) for page in pages]),
+               per=len(pages))
+
+
+def bench_load(size, rng, record, course_data, groups):
+    course_bytes = json.dumps(course_data, ensure_ascii=False, indent=4).encode("utf-8")
+    record("load/json", size, measure(lambda: json.loads(course_bytes)))
+    record("load/ijson", size, measure(lambda: sum(1 for _ in iter_courses(io.BytesIO(course_bytes)))))
+    record("load/build_catalog", size, measure(lambda: build_catalog(course_data, groups, "bench")))
+
+
+def bench_overlap(size, rng, record, course_data, groups):
+    completed = random_completed(course_data, rng)
+    overlap_index = OverlapIndex(groups)
+    record("overlap/incorporate_raw_groups", size,
+           measure(lambda: incorporate_overlapping_courses(course_data, groups, completed)))
+    record("overlap/incorporate_prebuilt_index", size,
+           measure(lambda: incorporate_overlapping_courses(course_data, overlap_index, completed)))
+
+
+def bench_next(size, rng, record, course_data, groups):
+    completed = random_completed(course_data, rng)
+    course_graph = CourseGraph(course_data, OverlapIndex(groups))
+    record("next/identify_next_courses", size, measure(lambda: identify_next_courses(course_data, completed)))
+    record("next/prebuilt_graph", size, measure(lambda: identify_next_courses(course_graph, completed)))
+
+
+def bench_wrap(size, rng, record, course_data, groups):
+    names = [details["name"] for details in course_data.values()]
+    record("wrap_text", size, measure(lambda: [wrap_text(name) for name in names]))
+    # Built once per catalog version; rendering then looks labels up by node
+    record("wrap/catalog_labels", size, measure(lambda: CourseLabels(names)))
+
+
+def bench_layout(size, rng, record, course_data, groups):
+    course_graph = CourseGraph(course_data, OverlapIndex(groups))
+    record("graphviz/dot_layout", size,
+           measure(lambda: capture_layout(build_course_graph(course_graph, [])), min_time=0))
+
+
+def bench_generate_graph(size, rng, record, course_data, groups):
+    with tempfile.TemporaryDirectory() as directory:
+        course_file = os.path.join(directory, "courses.json")
+        overlap_file = os.path.join(directory, "overlaps.json")
+        with open(course_file, "w", encoding="utf-8") as f:
+            json.dump(course_data, f, ensure_ascii=False, indent=4)
+        with open(overlap_file, "w", encoding="utf-8") as f:
+            json.dump(groups, f, ensure_ascii=False)
+        use_catalog_files(course_file, overlap_file)
+
+        import mainweb
+        client = mainweb.app.test_client()
+        # The first request lays out the catalog; later ones reuse the layout
+        first = measure(lambda: client.get("/generate_graph?format=png"), min_time=0)
+        record("generate_graph/first_request", size, first)
+
+        for format in ("png", "svg"):
+            def cold():
+                mainweb.render_cache.clear()
+                completed = ",".join(random_completed(course_data, rng))
+                response = client.get(f"/generate_graph?format={format}&completed_courses={completed}")
+                response.get_data()
+            record(f"generate_graph/{format}_uncached", size, measure(cold))
+
+            completed = ",".join(random_completed(course_data, rng))
+            url = f"/generate_graph?format={format}&completed_courses={completed}"
+            client.get(url).get_data()
+            record(f"generate_graph/{format}_cached", size, measure(lambda: client.get(url).get_data()))
+
+
+CATALOG_BENCHMARKS = {
+    "load": bench_load,
+    "overlap": bench_overlap,
+    "next": bench_next,
+    "wrap": bench_wrap,
+    "layout": bench_layout,
+    "generate_graph": bench_generate_graph,
+}
+RENDER_BENCHMARKS = {"layout", "generate_graph"}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_file):
+    """
+    Print each result's median next to the same benchmark in an earlier results file.
+    """
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\n{'benchmark':45} {'size':>7} {'before':>11} {'after':>11} {'ratio':>7}")
+    for result in results:
+        before = baseline.get((result["name"], result["size"]))
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else float("inf")
+        print(f"{result['name']:45} {result['size']:>7} {before['median'] * 1e3:>9.3f}ms "
+              f"{result['median'] * 1e3:>9.3f}ms {ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing, loading, filtering and rendering.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="synthetic catalog sizes, in courses")
+    parser.add_argument("--render-max", type=int, default=DEFAULT_RENDER_MAX,
+                        help="largest catalog to run Graphviz layout and /generate_graph on")
+    parser.add_argument("--only", nargs="+", choices=["parse", *CATALOG_BENCHMARKS],
+                        help="run only these benchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = []
+
+    def record(name, size, stats, per=1):
+        result = {"name": name, "size": size, **{
+            key: value / per if key != "runs" else value for key, value in stats.items()
+        }}
+        results.append(result)
+        print(f"{name:45} {size:>7} {result['median'] * 1e3:>10.3f}ms  ({result['runs']} runs)")
+
+    selected = set(args.only or ["parse", *CATALOG_BENCHMARKS])
+    if "parse" in selected:
+        bench_parse(PARSE_PAGES, random.Random(args.seed), record)
+    for size in args.sizes:
+        rng = random.Random(args.seed + size)
+        course_data, groups = synthetic_catalog(size, seed=args.seed + size)
+        for name, benchmark in CATALOG_BENCHMARKS.items():
+            if name not in selected or (name in RENDER_BENCHMARKS and size > args.render_max):
+                continue
+            benchmark(size, rng, record, course_data, groups)
+
+    output = {
+        "meta": {
+            "commit": git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "ijson_backend": ijson_backend.backend,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
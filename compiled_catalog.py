@@ -0,0 +1,352 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from atomic_files import atomic_write
+from course_labels import LABEL_WIDTH, CourseLabels
+from graph_core import CourseGraph
+from overlap_index import OverlapIndex
+
+COMPILED_FILE = "course_catalog.bin"
+
+MAGIC = b"CCAT"
+FORMAT_VERSION = 3
+
+# Header: magic, format version, section count, catalog version (16 hex characters)
+HEADER = struct.Struct("<4sII16s")
+# Section table entry: byte offset and byte length
+SECTION = struct.Struct("<QQ")
+
+# Sections in file order. Integer arrays hold native 4-byte ints (the file is only
+# written and read on little-endian machines) and start on 8-byte boundaries. Text
+# sections are UTF-8 strings separated by NUL, so each decodes with one split.
+SECTIONS = (
+    "node_ids",  # text, each node's course ID
+    "names",  # text, each catalog course's name
+    "prereq_offsets",  # int32 CSR offsets into prereq_targets, per node
+    "prereq_targets",  # int32 prerequisite nodes, in source order with duplicates kept
+    "graph_prereq_offsets",  # int32 CourseGraph CSR, duplicates removed
+    "graph_prereq_targets",
+    "dependent_offsets",  # int32 CSR of dependents, per node
+    "dependent_targets",
+    "group_offsets",  # int32 CSR offsets into group_members, per overlapping group
+    "group_members",  # int32 nodes of each group, in source order
+    "class_ids",  # int32 overlap equivalence class of each node, -1 for none
+    "label_width",  # int32, the LABEL_WIDTH the labels below were wrapped to
+    "label_lines",  # text, each course's wrapped label lines joined by newlines
+    "label_html",  # text, each course's Graphviz HTML-like label body
+    "courses_json",  # the /get_courses response body
+)
+
+
+TEXT_SEPARATOR = "\0"
+
+
+class CompiledCatalogError(Exception):
+    """
+    Raised when a compiled catalog file is missing, truncated or of another format.
+    """
+
+
+def _int_array(values, typecode="i"):
+    return array(typecode, values).tobytes()
+
+
+def _text(strings):
+    strings = list(strings)
+    if any(TEXT_SEPARATOR in text for text in strings):
+        raise CompiledCatalogError("course IDs and names cannot contain NUL characters")
+    return TEXT_SEPARATOR.join(strings).encode("utf-8")
+
+
+def compile_catalog(catalog, output_file=COMPILED_FILE):
+    """
+    Write a CourseCatalog as a compact binary file: course IDs and names, integer
+    adjacency arrays, overlap class IDs and wrapped labels. The file is replaced atomically.
+    """
+    if sys.byteorder != "little":
+        raise CompiledCatalogError("compiled catalogs are only supported on little-endian machines")
+
+    graph = catalog.graph
+    prereq_offsets = [0]
+    prereq_targets = []
+    for details in catalog.courses.values():
+        prereq_targets.extend(graph.index[prereq] for prereq in details["prerequisites"])
+        prereq_offsets.append(len(prereq_targets))
+    prereq_offsets.extend([len(prereq_targets)] * (len(graph) - graph.course_count))
+
+    group_offsets = [0]
+    group_members = []
+    for group in catalog.overlapping_groups:
+        group_members.extend(graph.index[course] for course in group)
+        group_offsets.append(len(group_members))
+
+    class_of = catalog.overlap_index.class_of
+    class_ids = [class_of.get(course_id, -1) for course_id in graph.ids]
+
+    sections = {
+        "node_ids": _text(graph.ids),
+        "names": _text(details["name"] for details in catalog.courses.values()),
+        "prereq_offsets": _int_array(prereq_offsets),
+        "prereq_targets": _int_array(prereq_targets),
+        "graph_prereq_offsets": graph.prereq_offsets.tobytes(),
+        "graph_prereq_targets": graph.prereq_targets.tobytes(),
+        "dependent_offsets": graph.dependent_offsets.tobytes(),
+        "dependent_targets": graph.dependent_targets.tobytes(),
+        "group_offsets": _int_array(group_offsets),
+        "group_members": _int_array(group_members),
+        "class_ids": _int_array(class_ids),
+        "label_width": _int_array([catalog.labels.max_width]),
+        "label_lines": _text("\n".join(lines) for lines in catalog.labels.lines),
+        "label_html": _text(catalog.labels.html),
+        "courses_json": catalog.courses_json,
+    }
+
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    table = []
+    body = []
+    for name in SECTIONS:
+        padding = -offset % 8
+        body.append(b"\0" * padding)
+        offset += padding
+        data = sections[name]
+        table.append(SECTION.pack(offset, len(data)))
+        body.append(data)
+        offset += len(data)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(SECTIONS), catalog.version.encode("ascii"))
+    atomic_write(output_file, [header, *table, *body], prefix=".catalog-")
+
+
+class CompiledCatalog:
+    """
+    Read-only view of a compiled catalog file through mmap.
+
+    Integer sections are exposed as memoryviews straight over the mapping, so
+    opening the file copies nothing and worker processes share its pages. The
+    course IDs and names are decoded once, on first use.
+    """
+
+    def __init__(self, path=COMPILED_FILE):
+        if sys.byteorder != "little":
+            raise CompiledCatalogError("compiled catalogs are only supported on little-endian machines")
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise CompiledCatalogError(f"{path} is empty") from None
+        view = memoryview(self._mmap)
+        if len(view) < HEADER.size:
+            raise CompiledCatalogError(f"{path} is truncated")
+        magic, format_version, section_count, version = HEADER.unpack_from(view)
+        if magic != MAGIC or format_version != FORMAT_VERSION or section_count != len(SECTIONS):
+            raise CompiledCatalogError(f"{path} is not a format {FORMAT_VERSION} compiled catalog")
+        self.version = version.rstrip(b"\0").decode("ascii")
+
+        self.sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(view, HEADER.size + SECTION.size * i)
+            if offset + length > len(view):
+                raise CompiledCatalogError(f"{path} is truncated")
+            self.sections[name] = view[offset:offset + length]
+        self._ids = self._names = None
+
+    def close(self):
+        """
+        Unmap the file. Views still held elsewhere, such as the arrays of a graph
+        from course_graph(), keep it mapped until they are released.
+        """
+        self.sections = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def text(self, name):
+        """
+        Decode a text section into its list of strings.
+        """
+        text = str(self.sections[name], "utf-8")
+        return text.split(TEXT_SEPARATOR) if text else []
+
+    def ints(self, name):
+        """
+        Return an integer section as a zero-copy memoryview.
+        """
+        return self.sections[name].cast("i")
+
+    def course_ids(self):
+        """
+        Return the course ID of every node, decoded once and shared by later calls.
+        """
+        if self._ids is None:
+            self._ids = tuple(self.text("node_ids"))
+        return self._ids
+
+    def names(self):
+        """
+        Return the name of every catalog course, decoded once and shared by later calls.
+        """
+        if self._names is None:
+            self._names = tuple(self.text("names"))
+        return self._names
+
+    def course_data(self):
+        """
+        Rebuild {course_id: {"name", "prerequisites"}} in the source order.
+        """
+        ids = self.course_ids()
+        offsets = self.ints("prereq_offsets")
+        targets = self.ints("prereq_targets")
+        return {
+            ids[node]: {
+                "name": name,
+                "prerequisites": [ids[target] for target in targets[offsets[node]:offsets[node + 1]]],
+            }
+            for node, name in enumerate(self.names())
+        }
+
+    def courses(self, index=None):
+        """
+        Return a read-only {course_id: {"name", "prerequisites"}} mapping that builds
+        each course's entry only when it is looked up. index maps course IDs to node
+        numbers, such as a CourseGraph's index; it is built if not given.
+        """
+        if index is None:
+            index = {course_id: node for node, course_id in enumerate(self.course_ids())}
+        return CompiledCourses(self, index)
+
+    def overlapping_groups(self):
+        """
+        Rebuild the overlapping groups as lists of course IDs, in the source order.
+        """
+        ids = self.course_ids()
+        offsets = self.ints("group_offsets")
+        members = self.ints("group_members")
+        return [
+            [ids[member] for member in members[offsets[i]:offsets[i + 1]]]
+            for i in range(len(offsets) - 1)
+        ]
+
+    def course_graph(self, overlap_index=None):
+        """
+        Build a CourseGraph whose adjacency arrays are views over the mapped file.
+        """
+        return CourseGraph.from_arrays(
+            self.course_ids(),
+            self.names(),
+            self.ints("graph_prereq_offsets"),
+            self.ints("graph_prereq_targets"),
+            self.ints("dependent_offsets"),
+            self.ints("dependent_targets"),
+            overlap_index,
+        )
+
+    def labels(self, max_width=LABEL_WIDTH):
+        """
+        Return the CourseLabels wrapped at compile time, or wrap the names afresh if
+        they were wrapped to another width.
+        """
+        if self.ints("label_width")[0] != max_width:
+            return CourseLabels(self.names(), max_width)
+        lines = tuple(tuple(text.split("\n")) if text else () for text in self.text("label_lines"))
+        return CourseLabels.from_wrapped(lines, tuple(self.text("label_html")), max_width)
+
+    def overlap_index(self):
+        """
+        Rebuild the OverlapIndex from the groups and the stored class IDs.
+        """
+        return OverlapIndex.from_classes(self.overlapping_groups(), self.class_of())
+
+    def class_of(self):
+        """
+        Return {course_id: overlap class ID} for courses in an overlapping group.
+        """
+        ids = self.course_ids()
+        return {ids[node]: class_id for node, class_id in enumerate(self.ints("class_ids")) if class_id >= 0}
+
+
+class CompiledCourses(Mapping):
+    """
+    The courses of a compiled catalog as a read-only mapping, in catalog order.
+    Entries are built from the mapped arrays on lookup, so loading a catalog does
+    not build one dict per course.
+    """
+
+    def __init__(self, compiled, index):
+        self._ids = compiled.course_ids()
+        self._names = compiled.names()
+        self._offsets = compiled.ints("prereq_offsets")
+        self._targets = compiled.ints("prereq_targets")
+        self._index = index
+
+    def __getitem__(self, course_id):
+        node = self._index.get(course_id)
+        if node is None or node >= len(self._names):
+            raise KeyError(course_id)
+        ids = self._ids
+        return MappingProxyType({
+            "name": self._names[node],
+            "prerequisites": tuple(
+                ids[target] for target in self._targets[self._offsets[node]:self._offsets[node + 1]]
+            ),
+        })
+
+    def __contains__(self, course_id):
+        node = self._index.get(course_id)
+        return node is not None and node < len(self._names)
+
+    def __iter__(self):
+        return iter(self._ids[:len(self._names)])
+
+    def __len__(self):
+        return len(self._names)
+
+
+def verify_round_trip(catalog, compiled):
+    """
+    Compare a catalog loaded from JSON with its compiled form.
+    Returns a list of differences, empty when the round trip is exact.
+    """
+    problems = []
+    if compiled.version != catalog.version:
+        problems.append(f"version {compiled.version} != {catalog.version}")
+    expected = {
+        course_id: {"name": details["name"], "prerequisites": list(details["prerequisites"])}
+        for course_id, details in catalog.courses.items()
+    }
+    course_data = compiled.course_data()
+    if list(course_data) != list(expected):
+        problems.append("course order differs")
+    for course_id, details in expected.items():
+        if course_data.get(course_id) != details:
+            problems.append(f"course {course_id} differs: {course_data.get(course_id)} != {details}")
+    if compiled.overlapping_groups() != [list(group) for group in catalog.overlapping_groups]:
+        problems.append("overlapping groups differ")
+    if compiled.class_of() != catalog.overlap_index.class_of:
+        problems.append("overlap class IDs differ")
+    if bytes(compiled.sections["courses_json"]) != catalog.courses_json:
+        problems.append("courses JSON differs")
+
+    graph = catalog.graph
+    compiled_graph = compiled.course_graph(catalog.overlap_index)
+    if compiled_graph.ids != graph.ids or compiled_graph.names != graph.names:
+        problems.append("graph nodes differ")
+    for name in ("prereq_offsets", "prereq_targets", "dependent_offsets", "dependent_targets"):
+        if list(getattr(compiled_graph, name)) != list(getattr(graph, name)):
+            problems.append(f"graph {name} differ")
+    labels = compiled.labels(catalog.labels.max_width)
+    if labels.lines != catalog.labels.lines or labels.html != catalog.labels.html:
+        problems.append("labels differ")
+    return problems
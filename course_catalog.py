@@ -0,0 +1,331 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from atomic_files import atomic_write
+from compiled_catalog import (
+    COMPILED_FILE, CompiledCatalog, CompiledCatalogError, compile_catalog, verify_round_trip,
+)
+from course_labels import CourseLabels
+from graph_core import CourseGraph
+from overlap_index import OverlapIndex
+
+COURSE_FILE = "course_dependencies_with_names.json"
+OVERLAP_FILE = "final_overlapping_groups.json"
+# Every version of the data files written through save_json is kept here
+SNAPSHOT_DIR = "catalog_snapshots"
+SNAPSHOT_KEEP = 20
+
+
+class CatalogVersionError(Exception):
+    """
+    Raised when the data files do not hold the catalog version a caller asked for.
+    """
+
+
+@dataclass(frozen=True)
+class CourseCatalog:
+    """
+    Immutable snapshot of the course data and overlapping groups, with the
+    overlap index, compact course graph and wrapped node labels built once per snapshot.
+    """
+    courses: Mapping
+    overlapping_groups: tuple
+    overlap_index: OverlapIndex
+    graph: CourseGraph
+    version: str
+    courses_json: bytes
+    labels: CourseLabels
+
+
+def build_catalog(course_data, overlapping_groups, version):
+    """
+    Freeze parsed course data and overlapping groups into a CourseCatalog.
+    """
+    courses = MappingProxyType({
+        course_id: MappingProxyType({
+            "name": details["name"],
+            "prerequisites": tuple(details["prerequisites"]),
+        })
+        for course_id, details in course_data.items()
+    })
+    groups = tuple(tuple(group) for group in overlapping_groups)
+    # Serialized once so /get_courses never re-encodes the catalog
+    courses_json = json.dumps(course_data, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    overlap_index = OverlapIndex(groups)
+    graph = CourseGraph(courses, overlap_index)
+    labels = CourseLabels(graph.names)
+    return CourseCatalog(courses, groups, overlap_index, graph, version, courses_json, labels)
+
+
+def catalog_from_compiled(compiled):
+    """
+    Build a CourseCatalog from a CompiledCatalog without parsing any JSON. The
+    graph's adjacency arrays stay views over the mapped file, course entries are
+    built on lookup, the overlap index reuses the stored class IDs and the labels
+    are read back as they were wrapped at compile time.
+    """
+    groups = tuple(tuple(group) for group in compiled.overlapping_groups())
+    overlap_index = OverlapIndex.from_classes(groups, compiled.class_of())
+    graph = compiled.course_graph(overlap_index)
+    return CourseCatalog(
+        compiled.courses(graph.index), groups, overlap_index, graph, compiled.version,
+        bytes(compiled.sections["courses_json"]), compiled.labels(),
+    )
+
+
+def content_hash(data):
+    """
+    Return the short content hash used to name catalog snapshots and versions.
+    """
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def save_json(path, data, snapshot_dir=SNAPSHOT_DIR, keep=SNAPSHOT_KEEP, **dump_options):
+    """
+    Write a catalog data file atomically and keep a snapshot of this version named
+    by its content hash, such as catalog_snapshots/course_dependencies_with_names.<hash>.json
+    next to the file. Only the newest keep snapshots of each file are kept; writing
+    a version that already has a snapshot makes that snapshot the newest again.
+    Use catalog_version for the version the server will report.
+    """
+    dump_options.setdefault("ensure_ascii", False)
+    data_bytes = json.dumps(data, **dump_options).encode("utf-8")
+    digest = content_hash(data_bytes)
+    if snapshot_dir:
+        snapshot_dir = os.path.join(os.path.dirname(os.path.abspath(path)), snapshot_dir)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        stem, extension = os.path.splitext(os.path.basename(path))
+        snapshot = os.path.join(snapshot_dir, f"{stem}.{digest}{extension}")
+        if os.path.exists(snapshot):
+            os.utime(snapshot)
+        else:
+            atomic_write(snapshot, data_bytes)
+        _prune_snapshots(snapshot_dir, f"{stem}.", keep)
+    atomic_write(path, data_bytes)
+
+
+def _prune_snapshots(snapshot_dir, prefix, keep):
+    snapshots = sorted(
+        (entry for entry in os.scandir(snapshot_dir) if entry.name.startswith(prefix) and entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime_ns,
+    )
+    for entry in snapshots[:max(0, len(snapshots) - keep)]:
+        os.unlink(entry.path)
+
+
+def _read_catalog_files(course_file, overlap_file):
+    with open(course_file, "rb") as f:
+        course_bytes = f.read()
+    with open(overlap_file, "rb") as f:
+        overlap_bytes = f.read()
+    return course_bytes, overlap_bytes, content_hash(course_bytes + b"\0" + overlap_bytes)
+
+
+def catalog_version(course_file=COURSE_FILE, overlap_file=OVERLAP_FILE):
+    """
+    Return the catalog version of the course and overlap JSON files, the one
+    load_catalog gives the catalog and the server reports.
+    """
+    return _read_catalog_files(course_file, overlap_file)[2]
+
+
+def load_catalog(course_file=COURSE_FILE, overlap_file=OVERLAP_FILE, compiled_file=None):
+    """
+    Load a CourseCatalog from the course and overlap JSON files. If compiled_file
+    was compiled from the same JSON, load that instead of parsing the JSON.
+    """
+    course_bytes, overlap_bytes, version = _read_catalog_files(course_file, overlap_file)
+    if compiled_file and os.path.exists(compiled_file):
+        try:
+            compiled = CompiledCatalog(compiled_file)
+        except CompiledCatalogError as e:
+            print(f"Ignoring {compiled_file}: {e}")
+        else:
+            if compiled.version == version:
+                return catalog_from_compiled(compiled)
+            compiled.close()
+    return build_catalog(json.loads(course_bytes), json.loads(overlap_bytes), version)
+
+
+class CatalogStore:
+    """
+    Holds the current CourseCatalog and swaps in a new one when the data files change.
+
+    The files are stat'ed at most once per check_interval seconds, on access or from
+    a watch() thread. A change starts one background load that parses the files,
+    builds the catalog's indexes and runs the prepare callbacks (for example to lay
+    out the new graph); meanwhile get() keeps returning the previous catalog. The new
+    catalog then replaces it in a single assignment, so a request that holds a catalog
+    sees one consistent version throughout.
+    """
+
+    def __init__(self, course_file=COURSE_FILE, overlap_file=OVERLAP_FILE, check_interval=1.0,
+                 compiled_file=None):
+        self.course_file = course_file
+        self.overlap_file = overlap_file
+        self.compiled_file = compiled_file
+        self.check_interval = check_interval
+        self.prepare = []
+        self._lock = threading.Lock()
+        self._loading = None
+        self._stamp = self._file_stamp()
+        self._catalog = load_catalog(course_file, overlap_file, compiled_file)
+        self._checked_at = time.monotonic()
+
+    def _file_stamp(self):
+        return tuple(
+            (st.st_ino, st.st_mtime_ns, st.st_size)
+            for st in (os.stat(self.course_file), os.stat(self.overlap_file))
+        )
+
+    def get(self):
+        """
+        Return the current catalog, starting a background reload if the files have changed.
+        """
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.check()
+        return self._catalog
+
+    def check(self):
+        """
+        Stat the data files and start a background reload if they changed.
+        Returns the reload thread, or None if there is nothing to load.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if self._loading is not None:
+                return self._loading
+            try:
+                stamp = self._file_stamp()
+            except FileNotFoundError:
+                return None  # Between a writer's unlink and rename; look again next time
+            if stamp == self._stamp:
+                return None
+            self._loading = threading.Thread(target=self._reload, args=(stamp,), daemon=True)
+            self._loading.start()
+            return self._loading
+
+    def _reload(self, stamp):
+        try:
+            catalog = load_catalog(self.course_file, self.overlap_file, self.compiled_file)
+            if catalog.version != self._catalog.version:
+                for callback in self.prepare:
+                    callback(catalog)
+                self._catalog = catalog
+                print(f"Catalog version {catalog.version} loaded")
+        except Exception as e:
+            # Keep serving the previous version; the next change to the files retries
+            print(f"Could not load the changed catalog files: {e}", file=sys.stderr)
+        finally:
+            with self._lock:
+                self._stamp = stamp
+                self._loading = None
+
+    def reload(self):
+        """
+        Check the files now and wait for any reload to finish. Returns the current catalog.
+        """
+        loading = self.check()
+        if loading is not None:
+            loading.join()
+        return self._catalog
+
+    def ensure_version(self, version):
+        """
+        Return the catalog of the given version, reloading and waiting for it if
+        this process still holds another one. Worker processes use this so they
+        render the version their caller keys the result by. Raises
+        CatalogVersionError if the files hold a different version.
+        """
+        catalog = self._catalog
+        if catalog.version == version:
+            return catalog
+        catalog = self.reload()
+        if catalog.version != version:
+            raise CatalogVersionError(f"wanted catalog version {version}, the files hold {catalog.version}")
+        return catalog
+
+    def watch(self):
+        """
+        Check the files every check_interval seconds from a daemon thread, so a new
+        version is ready before the next request rather than after it.
+        """
+        def poll():
+            while True:
+                time.sleep(self.check_interval)
+                self.check()
+
+        thread = threading.Thread(target=poll, daemon=True)
+        thread.start()
+        return thread
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def use_catalog_files(course_file, overlap_file, compiled_file=None):
+    """
+    Point the shared in-process catalog at other data files, such as synthetic
+    catalogs for benchmarks. The files are loaded immediately.
+    """
+    global _default_store
+    store = CatalogStore(course_file, overlap_file, compiled_file=compiled_file)
+    with _default_store_lock:
+        _default_store = store
+
+
+def catalog_store():
+    """
+    Return the CatalogStore behind get_catalog(), creating it on first use.
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = CatalogStore(compiled_file=COMPILED_FILE)
+    return _default_store
+
+
+def get_catalog(version=None):
+    """
+    Return the shared in-process catalog, loading it on first use. With a version,
+    wait for that version instead of returning an older one (see ensure_version).
+    """
+    if version is not None:
+        return catalog_store().ensure_version(version)
+    return catalog_store().get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the course catalog to its binary form.")
+    parser.add_argument("command", choices=["compile", "verify"],
+                        help="compile the JSON, or check an existing compiled file against it")
+    parser.add_argument("--courses", default=COURSE_FILE)
+    parser.add_argument("--overlaps", default=OVERLAP_FILE)
+    parser.add_argument("--output", default=COMPILED_FILE)
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.courses, args.overlaps)
+    if args.command == "compile":
+        compile_catalog(catalog, args.output)
+        print(f"Compiled catalog {catalog.version} to {args.output}")
+
+    with CompiledCatalog(args.output) as compiled:
+        problems = verify_round_trip(catalog, compiled)
+    for problem in problems:
+        print(problem)
+    print("Round trip OK" if not problems else f"{len(problems)} differences")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import html
+import re
+import unicodedata
+
+# Characters per line of a node label; node circles are 1.2 inches wide
+LABEL_WIDTH = 15
+
+# Directional marks and embeddings change how text is displayed, not how wide it is.
+# Course names from the catalog end in U+200F (right-to-left mark).
+BIDI_CONTROLS = frozenset(
+    "\u061c\u200e\u200f\u202a\u202b\u202c\u202d\u202e\u2066\u2067\u2068\u2069"
+)
+
+
+def _char_width(char):
+    if char in BIDI_CONTROLS or unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+# Characters other than Latin and Hebrew letters, which are one column each
+_SPECIAL_CHARS = re.compile("[^\u0000-\u02ff\u05d0-\u05f4]")
+# Widths of the special characters seen so far
+_char_widths = {}
+
+
+def display_width(text):
+    """
+    Return the number of columns text takes when displayed: bidi controls and
+    combining marks (such as Hebrew niqqud) take none, wide East Asian characters two.
+    """
+    width = len(text)
+    for char in _SPECIAL_CHARS.findall(text):
+        char_width = _char_widths.get(char)
+        if char_width is None:
+            char_width = _char_widths[char] = _char_width(char)
+        width += char_width - 1
+    return width
+
+
+def wrap_lines(label, max_width=LABEL_WIDTH):
+    """
+    Break text at spaces into lines of at most max_width display columns, in one
+    pass over the words. A word wider than max_width gets a line of its own.
+    """
+    lines = []
+    current_line = []
+    current_width = 0
+
+    for word in label.split():
+        width = display_width(word)
+        if current_line and current_width + 1 + width > max_width:
+            lines.append(" ".join(current_line))
+            current_line = [word]
+            current_width = width
+        elif current_line:
+            current_line.append(word)
+            current_width += 1 + width
+        else:
+            current_line = [word]
+            current_width = width
+
+    if current_line:
+        lines.append(" ".join(current_line))
+    return lines
+
+
+def html_label(lines):
+    """
+    Join label lines into the body of a Graphviz HTML-like label, escaping markup.
+    """
+    return "<br/>".join(html.escape(line, quote=False) for line in lines)
+
+
+def wrap_text(label, max_width=LABEL_WIDTH):
+    """
+    Wrap text to fit within a node by breaking at spaces, as a Graphviz HTML-like label.
+    """
+    return html_label(wrap_lines(label, max_width))
+
+
+class CourseLabels:
+    """
+    Wrapped labels of every catalog course, built once per catalog version.
+
+    lines holds the wrapped lines of each course name, for drawing in the browser;
+    html holds the same lines as escaped Graphviz HTML-like label bodies. Both are
+    indexed by node number, so rendering a label is a tuple lookup.
+    """
+
+    def __init__(self, names, max_width=LABEL_WIDTH):
+        self.max_width = max_width
+        self.lines = tuple(tuple(wrap_lines(name, max_width)) for name in names)
+        self.html = tuple(html_label(lines) for lines in self.lines)
+
+    @classmethod
+    def from_wrapped(cls, lines, html, max_width=LABEL_WIDTH):
+        """
+        Build labels from already wrapped lines and label bodies, such as those
+        stored in a compiled catalog.
+        """
+        labels = cls.__new__(cls)
+        labels.max_width = max_width
+        labels.lines = lines
+        labels.html = html
+        return labels
+
+    def __len__(self):
+        return len(self.html)
@@ -0,0 +1,301 @@
+import argparse
+import glob
+import os
+import re
+import sys
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# Relative course links on the program page are resolved against this site
+SITE_URL = "https://www.openu.ac.il"
+
+COURSE_ID_RE = re.compile(r'(\d+)\.htm')
+PREREQ_RE = re.compile(r"ידע קודם דרוש")
+
+# Tags html.parser's BeautifulSoup builder closes immediately
+EMPTY_ELEMENT_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem",
+    "meta", "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame",
+    "image", "isindex", "nextid", "spacer",
+}
+
+
+def parse_course_links(html, site_url=SITE_URL):
+    """
+    Extract course IDs and their page URLs from a program page.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    course_links = {}
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if "courses/" in href:  # Filter for course URLs
+            course_id = COURSE_ID_RE.search(href)  # Extract course ID
+            if course_id:
+                course_id = course_id.group(1)
+                # Handle relative and absolute URLs
+                if href.startswith('http'):
+                    course_links[course_id] = href
+                else:
+                    course_links[course_id] = site_url + href
+    return course_links
+
+
+def parse_prerequisites_and_name_bs4(html):
+    """
+    Extract the course name and prerequisite course IDs from a course page
+    by building the full BeautifulSoup tree. This is the reference parser.
+    """
+    prerequisites = []
+    course_name = "Unknown Course"
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Extract course name from <h1 id="course_title">
+    title_tag = soup.find('h1', id='course_title')
+    if title_tag:
+        course_name = title_tag.get_text(strip=True)
+
+    # Search for prerequisites
+    prereq_section = soup.find(string=PREREQ_RE)
+    if prereq_section:
+        parent = prereq_section.find_parent()
+        if parent:
+            for link in parent.find_all('a', href=True):
+                course_id = COURSE_ID_RE.search(link['href'])
+                if course_id:
+                    prerequisites.append(course_id.group(1))
+
+    return course_name, prerequisites
+
+
+def parse_prerequisites_and_name_lxml(html):
+    """
+    Extract the course name and prerequisites with lxml and two targeted XPath queries.
+    lxml repairs malformed markup differently from html.parser, so run
+    compare_parsers on real pages before relying on it.
+    """
+    prerequisites = []
+    course_name = "Unknown Course"
+    doc = lxml.html.fromstring(html)
+
+    title_tags = doc.xpath('//h1[@id="course_title"]')
+    if title_tags:
+        course_name = "".join(text.strip() for text in title_tags[0].itertext())
+
+    for text in doc.xpath('//text()'):
+        if PREREQ_RE.search(text):
+            parent = text.getparent()
+            if text.is_tail:
+                parent = parent.getparent()
+            if parent is not None:
+                for link in parent.iterdescendants('a'):
+                    href = link.get('href')
+                    if href is not None:
+                        course_id = COURSE_ID_RE.search(href)
+                        if course_id:
+                            prerequisites.append(course_id.group(1))
+            break
+
+    return course_name, prerequisites
+
+
+class _TargetedCourseParser(HTMLParser):
+    """
+    Event-driven extractor for the course title and prerequisite block.
+
+    It tracks only the open-element stack, mirroring how BeautifulSoup's
+    html.parser tree builder nests tags, and the hrefs of links seen so far.
+    It stops as soon as both the title and the prerequisite block are closed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Open elements as [tag, index of the first link opened inside it],
+        # under a root standing in for the BeautifulSoup document object
+        self.stack = [["[document]", 0]]
+        self.open_counts = {}
+        self.already_closed = []
+        self.links = []
+        self.text = []
+        self.title_element = None
+        self.title_parts = None
+        self.course_name = None
+        self.prereq_element = None
+        self.prerequisites = None
+
+    @property
+    def done(self):
+        return self.course_name is not None and self.prerequisites is not None
+
+    def _flush_text(self):
+        if not self.text:
+            return
+        text = "".join(self.text)
+        self.text = []
+        if self.title_element is not None and self.stack[-1][0] not in ("script", "style"):
+            stripped = text.strip()
+            if stripped:
+                self.title_parts.append(stripped)
+        self._check_prerequisites(text)
+
+    def _check_prerequisites(self, text):
+        if self.prereq_element is None and self.prerequisites is None:
+            if PREREQ_RE.search(text):
+                self.prereq_element = self.stack[-1]
+
+    def _pop(self):
+        element = self.stack.pop()
+        if len(self.stack):
+            self.open_counts[element[0]] -= 1
+        if element is self.title_element:
+            self.course_name = "".join(self.title_parts)
+            self.title_element = None
+        if element is self.prereq_element:
+            self.prerequisites = self._links_inside(element)
+            self.prereq_element = None
+
+    def _links_inside(self, element):
+        prerequisites = []
+        for href in self.links[element[1]:]:
+            course_id = COURSE_ID_RE.search(href)
+            if course_id:
+                prerequisites.append(course_id.group(1))
+        return prerequisites
+
+    def handle_starttag(self, tag, attrs, empty_element=True):
+        self._flush_text()
+        attr_dict = {key: "" if value is None else value for key, value in attrs}
+        if tag == "a" and "href" in attr_dict:
+            self.links.append(attr_dict["href"])
+        element = [tag, len(self.links)]
+        self.stack.append(element)
+        self.open_counts[tag] = self.open_counts.get(tag, 0) + 1
+        if (tag == "h1" and attr_dict.get("id") == "course_title"
+                and self.course_name is None and self.title_element is None):
+            self.title_element = element
+            self.title_parts = []
+        if empty_element and tag in EMPTY_ELEMENT_TAGS:
+            self.handle_endtag(tag, check_already_closed=False)
+            self.already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, empty_element=False)
+        self.handle_endtag(tag, check_already_closed=False)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self.already_closed:
+            self.already_closed.remove(tag)
+            return
+        self._flush_text()
+        # Pop up to and including the most recent open tag of this name, if any
+        if not self.open_counts.get(tag):
+            return
+        while len(self.stack) > 1:
+            name = self.stack[-1][0]
+            self._pop()
+            if name == tag:
+                break
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+        self._check_prerequisites(data)
+
+    handle_decl = handle_pi = unknown_decl = handle_comment
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        while self.stack:
+            self._pop()
+
+
+def parse_prerequisites_and_name_targeted(html, chunk_size=16384):
+    """
+    Extract the course name and prerequisites with a streaming html.parser pass
+    that keeps no tree and stops once both are found.
+    """
+    parser = _TargetedCourseParser()
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        if parser.done:
+            break
+    else:
+        parser.close()
+
+    course_name = parser.course_name
+    if course_name is None:
+        course_name = "Unknown Course"
+    return course_name, parser.prerequisites or []
+
+
+PARSER_BACKENDS = {
+    "bs4": parse_prerequisites_and_name_bs4,
+    "targeted": parse_prerequisites_and_name_targeted,
+}
+if lxml is not None:
+    PARSER_BACKENDS["lxml"] = parse_prerequisites_and_name_lxml
+
+DEFAULT_PARSER = "targeted"
+
+
+def parse_prerequisites_and_name(html, backend=DEFAULT_PARSER):
+    """
+    Extract the course name and prerequisite course IDs from a course page
+    with the chosen parser backend.
+    """
+    return PARSER_BACKENDS[backend](html)
+
+
+def parse_course_page(body, backend=DEFAULT_PARSER):
+    """
+    Parse raw course page bytes. Module-level so it can run in a process pool.
+    """
+    return parse_prerequisites_and_name(body.decode("utf-8", errors="replace"), backend)
+
+
+def compare_parsers(pages, backends=None):
+    """
+    Run every backend on each (label, html) page and return the pages where a
+    backend disagrees with the bs4 reference, as {label: {backend: result}}.
+    """
+    backends = backends or [name for name in PARSER_BACKENDS if name != "bs4"]
+    mismatches = {}
+    for label, html in pages:
+        expected = parse_prerequisites_and_name_bs4(html)
+        results = {name: PARSER_BACKENDS[name](html) for name in backends}
+        if any(result != expected for result in results.values()):
+            mismatches[label] = {"bs4": expected, **results}
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check parser backends against the bs4 reference.")
+    parser.add_argument("paths", nargs="+", help="Saved course pages or directories of them")
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.paths:
+        files = sorted(glob.glob(os.path.join(path, "*.htm*"))) if os.path.isdir(path) else [path]
+        for file in files:
+            with open(file, 'r', encoding='utf-8') as f:
+                pages.append((file, f.read()))
+
+    mismatches = compare_parsers(pages)
+    for label, results in mismatches.items():
+        print(f"Mismatch in {label}:")
+        for name, result in results.items():
+            print(f"  {name}: {result}")
+    print(f"{len(pages) - len(mismatches)}/{len(pages)} pages parsed identically by all backends")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
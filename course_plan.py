@@ -0,0 +1,227 @@
+import heapq
+import threading
+from collections import OrderedDict
+
+from graph_core import flags_of
+
+# Plans are memoized per (data version, completed set, targets, cap)
+PLAN_CACHE_SIZE = 256
+DEFAULT_MAX_PER_SEMESTER = 4
+
+
+def _taken_for(course_graph, node):
+    """
+    Return the course taken to satisfy a node: the lowest numbered course sharing
+    an overlap group with it (catalog courses come first), or the node itself.
+    """
+    mask = course_graph.equivalent_mask(node)
+    return (mask & -mask).bit_length() - 1
+
+
+def strongly_connected_components(nodes, successors):
+    """
+    Tarjan's algorithm, iterative. Returns the components with more than one node,
+    or a single node depending on itself, as lists of nodes.
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(successors[root]))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in successors[node]:
+                        components.append(component)
+    return components
+
+
+def plan_courses(course_graph, completed_courses, targets=None, max_per_semester=DEFAULT_MAX_PER_SEMESTER):
+    """
+    Plan the remaining courses for a completed set.
+
+    Without targets every catalog course not yet satisfied is planned; with targets
+    only those and their unsatisfied prerequisites are. Courses satisfied through an
+    overlapping completed course count as done, and of several remaining courses
+    that overlap only one is planned (see "substitutions").
+
+    Returns a dict with:
+      levels         topological levels, level 0 being courses that can be taken now
+      longest_chain  the longest chain of remaining prerequisites
+      schedule       semesters of at most max_per_semester courses, longest chain first
+      lower_bound    the fewest semesters any schedule could need
+      cycles         prerequisite cycles, which are left out of the plan
+      blocked        courses in or after a cycle
+
+    Everything is linear in the planned subgraph except the schedule, which keeps a
+    heap of ready courses. With a per-semester cap, the minimum is NP-hard in general;
+    scheduling by remaining chain length (Hu's rule) is optimal for tree-shaped
+    prerequisites and close otherwise.
+    """
+    max_per_semester = max(1, int(max_per_semester))
+    satisfied = flags_of(course_graph.satisfied_mask(course_graph.mask_of(completed_courses)), len(course_graph))
+
+    if targets:
+        seeds = [course_graph.index[course] for course in targets if course in course_graph.index]
+    else:
+        seeds = range(course_graph.course_count)
+    substitutions = {}
+    planned = {}
+    queue = []
+    for node in seeds:
+        if satisfied[node]:
+            continue
+        taken = _taken_for(course_graph, node)
+        if taken != node:
+            substitutions[course_graph.ids[node]] = course_graph.ids[taken]
+        if taken not in planned:
+            planned[taken] = set()
+            queue.append(taken)
+
+    # Close over unsatisfied prerequisites, mapped to the course taken for each
+    while queue:
+        node = queue.pop()
+        prereqs = planned[node]
+        for prereq in course_graph.prerequisites(node):
+            if satisfied[prereq]:
+                continue
+            taken = _taken_for(course_graph, prereq)
+            if taken != prereq:
+                substitutions[course_graph.ids[prereq]] = course_graph.ids[taken]
+            if taken == node and prereq != node:
+                # The course itself covers an overlapping prerequisite
+                continue
+            prereqs.add(taken)
+            if taken not in planned:
+                planned[taken] = set()
+                queue.append(taken)
+
+    dependents = {node: [] for node in planned}
+    for node, prereqs in planned.items():
+        for prereq in prereqs:
+            dependents[prereq].append(node)
+
+    # Kahn's algorithm; whatever is left over sits on or behind a cycle
+    waiting = {node: len(prereqs) for node, prereqs in planned.items()}
+    order = [node for node in sorted(planned) if not waiting[node]]
+    level = dict.fromkeys(order, 0)
+    for node in order:
+        for dependent in dependents[node]:
+            level[dependent] = max(level.get(dependent, 0), level[node] + 1)
+            waiting[dependent] -= 1
+            if not waiting[dependent]:
+                order.append(dependent)
+
+    blocked = sorted(node for node in planned if waiting[node])
+    blocked_set = set(blocked)
+    cycles = strongly_connected_components(
+        blocked, {node: [d for d in dependents[node] if d in blocked_set] for node in blocked}
+    )
+
+    # Length of the longest chain starting at each course, in reverse topological order
+    height = {}
+    for node in reversed(order):
+        height[node] = 1 + max((height[d] for d in dependents[node] if d in height), default=0)
+
+    levels = [[] for _ in range(max((level[node] for node in order), default=-1) + 1)]
+    for node in order:
+        levels[level[node]].append(node)
+
+    chain = []
+    if height:
+        node = max(order, key=lambda n: (height[n], -n))
+        while True:
+            chain.append(node)
+            successors = [d for d in dependents[node] if height.get(d) == height[node] - 1]
+            if not successors:
+                break
+            node = min(successors)
+
+    schedule = []
+    ready = [(-height[node], node) for node in order if level[node] == 0]
+    heapq.heapify(ready)
+    remaining = {node: len(planned[node]) for node in order}
+    while ready:
+        semester = [heapq.heappop(ready)[1] for _ in range(min(max_per_semester, len(ready)))]
+        for node in semester:
+            for dependent in dependents[node]:
+                if dependent in remaining:
+                    remaining[dependent] -= 1
+                    if not remaining[dependent]:
+                        heapq.heappush(ready, (-height[dependent], dependent))
+        schedule.append(sorted(semester))
+
+    ids = course_graph.ids
+    return {
+        "levels": [[ids[node] for node in sorted(nodes)] for nodes in levels],
+        "longest_chain": [ids[node] for node in chain],
+        "schedule": [[ids[node] for node in semester] for semester in schedule],
+        "semesters": len(schedule),
+        # No schedule can be shorter than the longest chain or than courses / cap
+        "lower_bound": max(len(chain), -(-len(order) // max_per_semester)),
+        "max_per_semester": max_per_semester,
+        "substitutions": substitutions,
+        "cycles": [[ids[node] for node in sorted(component)] for component in cycles],
+        "blocked": [ids[node] for node in blocked],
+    }
+
+
+class PlanCache:
+    """
+    Small LRU of plans keyed by data version, completed set, targets and cap.
+    """
+
+    def __init__(self, max_entries=PLAN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, catalog, completed_courses, targets=None, max_per_semester=DEFAULT_MAX_PER_SEMESTER):
+        """
+        Return the plan for a completed set, computing it on a miss.
+        """
+        key = (catalog.version, frozenset(completed_courses), tuple(sorted(set(targets or ()))),
+               max_per_semester)
+        with self._lock:
+            plan = self._entries.get(key)
+            if plan is not None:
+                self._entries.move_to_end(key)
+                return plan
+
+        plan = plan_courses(catalog.graph, completed_courses, targets, max_per_semester)
+        with self._lock:
+            self._entries[key] = plan
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return plan
@@ -0,0 +1,128 @@
+import argparse
+import sys
+from dataclasses import dataclass
+
+import ijson
+
+from course_catalog import COURSE_FILE, OVERLAP_FILE
+
+# Prefer the C (yajl2_c) backend; ijson falls back to pure Python when it is not built
+try:
+    ijson_backend = ijson.get_backend("yajl2_c")
+except ImportError:
+    ijson_backend = ijson
+
+
+@dataclass(frozen=True, slots=True)
+class CourseRecord:
+    """
+    One course from the catalog JSON.
+    """
+    course_id: str
+    name: str
+    prerequisites: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class PrerequisiteEdge:
+    """
+    A dependency edge: prerequisite must be completed before course.
+    """
+    prerequisite: str
+    course: str
+
+
+def _open_binary(source):
+    if hasattr(source, "read"):
+        return source, False
+    return open(source, "rb"), True
+
+
+def iter_courses(source=COURSE_FILE):
+    """
+    Yield a CourseRecord per course from a catalog JSON file path or binary file
+    object, one at a time, in file order. Only the current course is held in memory.
+    """
+    f, owned = _open_binary(source)
+    try:
+        for course_id, data in ijson_backend.kvitems(f, ""):
+            yield CourseRecord(
+                course_id,
+                data.get("name", f"Course {course_id}"),
+                tuple(data.get("prerequisites", ())),
+            )
+    finally:
+        if owned:
+            f.close()
+
+
+def iter_edges(records):
+    """
+    Yield the PrerequisiteEdges of a stream of CourseRecords.
+    """
+    for record in records:
+        for prereq in record.prerequisites:
+            yield PrerequisiteEdge(prereq, record.course_id)
+
+
+def iter_overlap_groups(source=OVERLAP_FILE):
+    """
+    Yield each overlapping group as a tuple of course IDs.
+    """
+    f, owned = _open_binary(source)
+    try:
+        for group in ijson_backend.items(f, "item"):
+            yield tuple(group)
+    finally:
+        if owned:
+            f.close()
+
+
+def validate_courses(records):
+    """
+    Check a stream of CourseRecords in one pass. Only course IDs are kept, not records.
+    Returns a summary dict with counts and lists of problems.
+    """
+    seen = set()
+    referenced = set()
+    duplicates = []
+    self_references = []
+    unnamed = []
+    edge_count = 0
+    for record in records:
+        if record.course_id in seen:
+            duplicates.append(record.course_id)
+        seen.add(record.course_id)
+        if record.name == f"Course {record.course_id}":
+            unnamed.append(record.course_id)
+        for prereq in record.prerequisites:
+            edge_count += 1
+            if prereq == record.course_id:
+                self_references.append(prereq)
+            referenced.add(prereq)
+    return {
+        "courses": len(seen),
+        "edges": edge_count,
+        "duplicates": duplicates,
+        "self_references": self_references,
+        "unnamed": unnamed,
+        "missing_prerequisites": sorted(referenced - seen),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a course catalog JSON file in one streaming pass.")
+    parser.add_argument("course_file", nargs="?", default=COURSE_FILE)
+    args = parser.parse_args()
+
+    summary = validate_courses(iter_courses(args.course_file))
+    print(f"{summary['courses']} courses, {summary['edges']} prerequisite edges "
+          f"(ijson backend: {ijson_backend.backend})")
+    for key in ("duplicates", "self_references", "unnamed", "missing_prerequisites"):
+        if summary[key]:
+            print(f"{key}: {', '.join(summary[key])}")
+    return 1 if summary["duplicates"] or summary["self_references"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,456 @@
+from array import array
+
+
+def iter_bits(mask):
+    """
+    Yield the positions of the set bits of an integer, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# bin() digits to one byte per node and back, so masks convert to flags in linear time
+_DIGIT_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+_FLAG_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def flags_of(mask, size):
+    """
+    Return a bytearray of size entries, 1 where the mask has a bit set. Looking a
+    node up in it is O(1), where shifting a catalog-wide mask is O(V).
+    """
+    flags = bytearray(bin(mask)[:1:-1].encode().translate(_DIGIT_FLAGS))
+    if len(flags) < size:
+        flags.extend(bytes(size - len(flags)))
+    else:
+        del flags[size:]
+    return flags
+
+
+def mask_of_flags(flags):
+    """
+    Return the bitmask of the nonzero entries of a bytearray of 0/1 flags.
+    """
+    return int(bytes(flags[::-1]).translate(_FLAG_DIGITS) or b"0", 2)
+
+
+class CourseGraph:
+    """
+    Compact, integer-indexed form of the course dependency graph.
+
+    Course IDs are interned to dense node numbers: catalog courses first, in
+    catalog order, then prerequisites missing from the catalog, then overlapping
+    courses that appear in neither. Prerequisite and dependent adjacency are
+    stored CSR-style in array('i') buffers, and course sets are integer bitmasks
+    over node numbers. Eligibility walks the CSR edges against a bytearray of
+    satisfied nodes, so it is O(V + E) per completed set and no per-node mask
+    is kept.
+    """
+
+    def __init__(self, course_data, overlap_index=None):
+        ids = list(course_data)
+        index = {course_id: node for node, course_id in enumerate(ids)}
+        referenced = [prereq for details in course_data.values() for prereq in details["prerequisites"]]
+        if overlap_index is not None:
+            # Overlapping courses outside the catalog still count when completed
+            referenced.extend(sorted(overlap_index.class_of))
+        for course_id in referenced:
+            if course_id not in index:
+                index[course_id] = len(ids)
+                ids.append(course_id)
+
+        node_count = len(ids)
+        prereq_offsets = array("i", [0])
+        prereq_targets = array("i")
+        dependent_lists = [[] for _ in range(node_count)]
+        for node, details in enumerate(course_data.values()):
+            seen = set()
+            for prereq in details["prerequisites"]:
+                prereq_node = index[prereq]
+                if prereq_node not in seen:
+                    seen.add(prereq_node)
+                    prereq_targets.append(prereq_node)
+                    dependent_lists[prereq_node].append(node)
+            prereq_offsets.append(len(prereq_targets))
+        # Nodes outside the catalog have no prerequisites of their own
+        prereq_offsets.extend([len(prereq_targets)] * (node_count - len(course_data)))
+
+        dependent_offsets = array("i", [0])
+        dependent_targets = array("i")
+        for dependents in dependent_lists:
+            dependent_targets.extend(dependents)
+            dependent_offsets.append(len(dependent_targets))
+
+        self._set_arrays(
+            ids, [details["name"] for details in course_data.values()], prereq_offsets,
+            prereq_targets, dependent_offsets, dependent_targets, overlap_index,
+        )
+
+    @classmethod
+    def from_arrays(cls, ids, names, prereq_offsets, prereq_targets, dependent_offsets,
+                    dependent_targets, overlap_index=None):
+        """
+        Build a graph from already interned IDs and CSR adjacency, for example
+        memoryviews over a compiled catalog, without copying the arrays.
+        names holds one entry per catalog course; the catalog courses come first in ids.
+        """
+        graph = cls.__new__(cls)
+        graph._set_arrays(
+            ids, names, prereq_offsets, prereq_targets, dependent_offsets, dependent_targets,
+            overlap_index,
+        )
+        return graph
+
+    def _set_arrays(self, ids, names, prereq_offsets, prereq_targets, dependent_offsets,
+                    dependent_targets, overlap_index):
+        index = {course_id: node for node, course_id in enumerate(ids)}
+
+        # For each overlap bit the nodes it satisfies, and the overlap bits of each node
+        overlap_nodes = []
+        node_overlap = {}
+        if overlap_index is not None:
+            for bit, members in enumerate(overlap_index.bit_members):
+                nodes = tuple(index[course_id] for course_id in members)
+                overlap_nodes.append(nodes)
+                for node in nodes:
+                    node_overlap.setdefault(node, []).append(bit)
+        overlap_members = bytearray(len(ids))
+        for node in node_overlap:
+            overlap_members[node] = 1
+
+        self.ids = tuple(ids)
+        self.index = index
+        self.names = tuple(names)
+        self.course_count = len(names)
+        self.course_mask = (1 << len(names)) - 1
+        self.prereq_offsets = prereq_offsets
+        self.prereq_targets = prereq_targets
+        self.dependent_offsets = dependent_offsets
+        self.dependent_targets = dependent_targets
+        self.overlap_index = overlap_index
+        self._node_overlap = {node: tuple(bits) for node, bits in node_overlap.items()}
+        self._overlap_nodes = tuple(overlap_nodes)
+        self._overlap_members = mask_of_flags(overlap_members)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def prerequisites(self, node):
+        """
+        Return the prerequisite node numbers of a node.
+        """
+        return self.prereq_targets[self.prereq_offsets[node]:self.prereq_offsets[node + 1]]
+
+    def dependents(self, node):
+        """
+        Return the node numbers of courses that list the node as a prerequisite.
+        """
+        return self.dependent_targets[self.dependent_offsets[node]:self.dependent_offsets[node + 1]]
+
+    def mask_of(self, course_ids):
+        """
+        Convert course IDs to a node bitmask, ignoring IDs not in the graph.
+        """
+        mask = 0
+        index = self.index
+        for course_id in course_ids:
+            node = index.get(course_id)
+            if node is not None:
+                mask |= 1 << node
+        return mask
+
+    def ids_of(self, mask):
+        """
+        Convert a node bitmask back to course IDs, in node order.
+        """
+        ids = self.ids
+        return [ids[node] for node in iter_bits(mask)]
+
+    def equivalent_mask(self, node):
+        """
+        Return the nodes sharing an overlap group with a node, the node included.
+        """
+        mask = 1 << node
+        for bit in self._node_overlap.get(node, ()):
+            for other in self._overlap_nodes[bit]:
+                mask |= 1 << other
+        return mask
+
+    def satisfied_mask(self, completed_mask):
+        """
+        Return the nodes that count as done: completed ones plus those with a
+        completed overlapping equivalent.
+        """
+        satisfied = completed_mask
+        bits = set()
+        for node in iter_bits(completed_mask & self._overlap_members):
+            bits.update(self._node_overlap[node])
+        for bit in bits:
+            for other in self._overlap_nodes[bit]:
+                satisfied |= 1 << other
+        return satisfied
+
+    def next_flags(self, completed_flags, satisfied_flags):
+        """
+        Flag form of next_mask: given completed and satisfied flags per node (see
+        flags_of), return a bytearray marking the catalog courses that can be taken.
+        """
+        offsets = self.prereq_offsets
+        targets = self.prereq_targets
+        eligible = bytearray(self.course_count)
+        for node in range(self.course_count):
+            if completed_flags[node]:
+                continue
+            for edge in range(offsets[node], offsets[node + 1]):
+                if not satisfied_flags[targets[edge]]:
+                    break
+            else:
+                eligible[node] = 1
+        return eligible
+
+    def next_mask(self, completed_mask, satisfied=None):
+        """
+        Return the courses that are not completed and have every prerequisite satisfied.
+        """
+        if satisfied is None:
+            satisfied = self.satisfied_mask(completed_mask)
+        node_count = len(self.ids)
+        return mask_of_flags(
+            self.next_flags(flags_of(completed_mask, node_count), flags_of(satisfied, node_count))
+        )
+
+    def satisfied_columns(self, completed_columns):
+        """
+        Column form of satisfied_mask for many completed sets at once. Each entry of
+        completed_columns is the bitmask of sets (students) that completed that node;
+        returns the same per-node bitmasks for the sets in which the node counts as done.
+        """
+        overlap_done = {}
+        for node, bits in self._node_overlap.items():
+            column = completed_columns[node]
+            if column:
+                for bit in bits:
+                    overlap_done[bit] = overlap_done.get(bit, 0) | column
+        satisfied = list(completed_columns)
+        for node, bits in self._node_overlap.items():
+            for bit in bits:
+                satisfied[node] |= overlap_done.get(bit, 0)
+        return satisfied
+
+    def next_columns(self, completed_columns, all_sets, satisfied=None):
+        """
+        Column form of next_mask: for each catalog course, the bitmask of sets (out of
+        all_sets) that have not completed it and satisfy every prerequisite.
+        """
+        if satisfied is None:
+            satisfied = self.satisfied_columns(completed_columns)
+        offsets = self.prereq_offsets
+        targets = self.prereq_targets
+        eligible = []
+        for node in range(self.course_count):
+            column = all_sets & ~completed_columns[node]
+            for edge in range(offsets[node], offsets[node + 1]):
+                if not column:
+                    break
+                column &= satisfied[targets[edge]]
+            eligible.append(column)
+        return eligible
+
+    def node_statuses(self, completed_mask, satisfied=None):
+        """
+        Return a status per node: "completed", "next", "unavailable", or "external"
+        for prerequisites that are not in the catalog.
+        """
+        if satisfied is None:
+            satisfied = self.satisfied_mask(completed_mask)
+        node_count = len(self.ids)
+        completed = flags_of(completed_mask, node_count)
+        eligible = self.next_flags(completed, flags_of(satisfied, node_count))
+        statuses = []
+        for node in range(node_count):
+            if node >= self.course_count:
+                statuses.append("external")
+            elif completed[node]:
+                statuses.append("completed")
+            elif eligible[node]:
+                statuses.append("next")
+            else:
+                statuses.append("unavailable")
+        return statuses
+
+    def edge_status(self, prereq, completed_mask, satisfied):
+        """
+        Return "met" for a completed prerequisite, "hidden" for one covered by a
+        completed overlapping course, and "unmet" otherwise.
+        """
+        if (completed_mask >> prereq) & 1:
+            return "met"
+        if (satisfied >> prereq) & 1:
+            return "hidden"
+        return "unmet"
+
+    def next_courses(self, completed_courses):
+        """
+        Return the IDs of courses that can be taken next, in catalog order.
+        """
+        return self.ids_of(self.next_mask(self.mask_of(completed_courses)))
+
+
+def as_course_graph(course_data, overlap_index=None):
+    """
+    Accept either plain course data or an already built CourseGraph.
+    """
+    if isinstance(course_data, CourseGraph):
+        return course_data
+    return CourseGraph(course_data, overlap_index)
+
+
+def prefix_sets(course_graph, max_size, limit=None):
+    """
+    Enumerate the completed sets a student could actually have, smallest first: every
+    set of up to max_size courses that can be built by taking, one at a time, courses
+    whose prerequisites are satisfied, counting overlap-equivalent courses as done.
+    Sets that satisfy the same courses are the same to a student, so only the first
+    set found for each satisfied set is produced; taking a course whose equivalent is
+    done adds nothing and is never done. Stops after limit sets.
+    """
+    ids = course_graph.ids
+    level = [(0, 0)]
+    seen = {0}
+    count = 0
+    for size in range(max_size + 1):
+        # Sets past the limit would never be produced, so none are built
+        remaining = None if limit is None else limit - count - len(level)
+        next_level = []
+        for mask, satisfied in level:
+            yield [ids[node] for node in iter_bits(mask)]
+            count += 1
+            if limit is not None and count >= limit:
+                return
+            if size == max_size or remaining is not None and len(next_level) >= remaining:
+                continue
+            for node in iter_bits(course_graph.next_mask(mask, satisfied) & ~satisfied):
+                next_satisfied = satisfied | course_graph.equivalent_mask(node)
+                if next_satisfied in seen:
+                    continue
+                seen.add(next_satisfied)
+                next_level.append((mask | 1 << node, next_satisfied))
+                if remaining is not None and len(next_level) >= remaining:
+                    break
+        level = next_level
+
+
+# Views accepted by Reachability.view_mask
+FOCUS_VIEWS = ("ancestors", "descendants", "neighborhood", "frontier")
+
+
+class Reachability:
+    """
+    Prerequisite reachability over a CourseGraph, for drawing only part of the catalog.
+
+    Walks the graph's CSR prerequisite and dependent arrays. The full ancestor or
+    descendant closure of a node is computed on first use and kept, reusing the
+    closures of nodes it reaches, so repeated views of the same courses cost one OR
+    per seed and memory follows the nodes actually viewed. Views limited to k hops
+    expand one level at a time, so their cost follows the size of the view rather
+    than the catalog.
+    """
+
+    def __init__(self, course_graph):
+        self.graph = course_graph
+        self._ancestors = {}
+        self._descendants = {}
+
+    def _closure(self, node, adjacent, memo):
+        closure = memo.get(node)
+        if closure is not None:
+            return closure
+        reached = bytearray(len(self.graph))
+        known = 0
+        stack = list(adjacent(node))
+        while stack:
+            other = stack.pop()
+            if reached[other]:
+                continue
+            reached[other] = 1
+            other_closure = memo.get(other)
+            if other_closure is not None:
+                known |= other_closure
+            else:
+                stack.extend(adjacent(other))
+        closure = memo[node] = mask_of_flags(reached) | known
+        return closure
+
+    def _reach(self, mask, adjacent, memo, hops):
+        if hops is None:
+            reached = mask
+            for node in iter_bits(mask):
+                reached |= self._closure(node, adjacent, memo)
+            return reached
+        reached = flags_of(mask, len(self.graph))
+        frontier = list(iter_bits(mask))
+        for _ in range(hops):
+            expand = []
+            for node in frontier:
+                for other in adjacent(node):
+                    if not reached[other]:
+                        reached[other] = 1
+                        expand.append(other)
+            if not expand:
+                break
+            frontier = expand
+        return mask_of_flags(reached)
+
+    def ancestors(self, mask, hops=None):
+        """
+        Return the nodes of mask plus their prerequisites, transitively or within hops steps.
+        """
+        return self._reach(mask, self.graph.prerequisites, self._ancestors, hops)
+
+    def descendants(self, mask, hops=None):
+        """
+        Return the nodes of mask plus the courses that depend on them, transitively
+        or within hops steps.
+        """
+        return self._reach(mask, self.graph.dependents, self._descendants, hops)
+
+    def frontier(self, completed_mask, satisfied=None):
+        """
+        Return the courses that can be taken next, the courses they unlock, and the
+        prerequisites those unlocked courses are still missing.
+        """
+        graph = self.graph
+        if satisfied is None:
+            satisfied = graph.satisfied_mask(completed_mask)
+        node_count = len(graph)
+        satisfied_flags = flags_of(satisfied, node_count)
+        view = graph.next_flags(flags_of(completed_mask, node_count), satisfied_flags)
+        eligible = [node for node, flag in enumerate(view) if flag]
+        view.extend(bytes(node_count - len(view)))
+        unlocked = bytearray(node_count)
+        for node in eligible:
+            for dependent in graph.dependents(node):
+                if unlocked[dependent] or satisfied_flags[dependent]:
+                    continue
+                unlocked[dependent] = view[dependent] = 1
+                for prereq in graph.prerequisites(dependent):
+                    if not satisfied_flags[prereq]:
+                        view[prereq] = 1
+        return mask_of_flags(view)
+
+    def view_mask(self, view, focus_mask, completed_mask, hops=None):
+        """
+        Return the nodes to draw for one of FOCUS_VIEWS: the ancestors, descendants or
+        both ("neighborhood") of the focus courses, or the frontier of the completed set.
+        """
+        if view == "ancestors":
+            return self.ancestors(focus_mask, hops)
+        if view == "descendants":
+            return self.descendants(focus_mask, hops)
+        if view == "neighborhood":
+            return self.ancestors(focus_mask, hops) | self.descendants(focus_mask, hops)
+        if view == "frontier":
+            return self.frontier(completed_mask)
+        raise ValueError(f"unknown view {view!r}, expected one of {', '.join(FOCUS_VIEWS)}")
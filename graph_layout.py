@@ -0,0 +1,197 @@
+import subprocess
+import threading
+from collections import OrderedDict
+
+
+def capture_layout(graph, prog="dot"):
+    """
+    Run the layout engine once and capture node and edge geometry from the graph.
+    """
+    graph.layout(prog=prog)
+    nodes = {}
+    for node in graph.nodes():
+        nodes[str(node)] = {
+            "pos": node.attr["pos"],
+            "width": node.attr["width"],
+            "height": node.attr["height"],
+        }
+    edges = {}
+    for edge in graph.edges():
+        edges[(str(edge[0]), str(edge[1]))] = edge.attr["pos"]
+    return {"bb": graph.graph_attr["bb"], "nodes": nodes, "edges": edges}
+
+
+def layout_graph(graph, prog="dot", timeout=None):
+    """
+    Lay out a graph in a Graphviz process and read the positions back into it, as
+    graph.layout() does, but kill the process if it runs longer than timeout
+    seconds (raising subprocess.TimeoutExpired) so a pathological graph cannot
+    hold a render worker indefinitely.
+    """
+    result = subprocess.run(
+        [prog, "-Tdot"], input=graph.string().encode("utf-8"), capture_output=True, timeout=timeout,
+    )
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"{prog} exited with status {result.returncode}: {stderr}")
+    graph.from_string(result.stdout.decode("utf-8"))
+    graph.has_layout = True
+
+
+def apply_layout(graph, layout):
+    """
+    Copy precomputed geometry onto a freshly styled graph.
+    Returns False if the graph contains a node or edge the layout does not know.
+    """
+    nodes = layout["nodes"]
+    edges = layout["edges"]
+    for node in graph.nodes():
+        geometry = nodes.get(str(node))
+        if geometry is None:
+            return False
+        node.attr.update(geometry)
+    for edge in graph.edges():
+        pos = edges.get((str(edge[0]), str(edge[1])))
+        if pos is None:
+            return False
+        edge.attr["pos"] = pos
+    graph.graph_attr["bb"] = layout["bb"]
+    return True
+
+
+def draw_with_layout(graph, output_file, format="png"):
+    """
+    Draw a graph whose positions are already set, without running a layout pass.
+    """
+    # neato -n2 takes node positions and edge splines from the pos attributes as-is
+    graph.draw(output_file, format=format, prog="neato", args="-n2")
+
+
+def render_with_layout(graph, format="png", timeout=None):
+    """
+    Draw a graph whose positions are already set and return the image bytes.
+    The Graphviz process is killed if it runs longer than timeout seconds.
+    """
+    result = subprocess.run(
+        ["neato", "-n2", f"-T{format}"], input=graph.string().encode("utf-8"),
+        capture_output=True, timeout=timeout,
+    )
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"neato exited with status {result.returncode}: {stderr}")
+    return result.stdout
+
+
+def stream_with_layout(graph, format="svg", chunk_size=65536):
+    """
+    Draw a graph whose positions are already set and yield the output as Graphviz
+    produces it, instead of buffering the whole image.
+    """
+    process = subprocess.Popen(
+        ["neato", "-n2", f"-T{format}"], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+    dot_source = graph.string().encode("utf-8")
+
+    # Feed the input from a thread so a full output pipe cannot deadlock us
+    def feed():
+        try:
+            process.stdin.write(dot_source)
+        except BrokenPipeError:
+            pass  # neato was stopped early, see below
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        while True:
+            chunk = process.stdout.read1(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    except BaseException:
+        # The client went away (GeneratorExit) or reading failed: stop neato
+        # without raising over the original exception
+        process.kill()
+        process.stdout.close()
+        writer.join()
+        process.wait()
+        raise
+    process.stdout.close()
+    writer.join()
+    if process.wait() != 0:
+        raise RuntimeError(f"neato exited with status {process.returncode}")
+
+
+def _point(text, top):
+    x, y = text.split(",")[-2:]
+    # Graphviz puts the origin bottom-left; SVG and canvas put it top-left
+    return round(float(x), 1), round(top - float(y), 1)
+
+
+def svg_node_geometry(geometry, top):
+    """
+    Convert a node's Graphviz geometry to SVG coordinates: (x, y, rx, ry) in points.
+    """
+    x, y = _point(geometry["pos"], top)
+    return x, y, round(float(geometry["width"]) * 36, 1), round(float(geometry["height"]) * 36, 1)
+
+
+def svg_edge_geometry(pos, top):
+    """
+    Convert a Graphviz edge spline to an SVG path and its arrowhead segment.
+    Returns (path_d, [x1, y1, x2, y2]); the arrow segment is None if the edge has no head.
+    """
+    end = None
+    points = []
+    for token in pos.split():
+        if token.startswith("e,"):
+            end = _point(token, top)
+        elif not token.startswith("s,"):
+            points.append(_point(token, top))
+
+    path = [f"M{points[0][0]},{points[0][1]}"]
+    for i in range(1, len(points) - 2, 3):
+        path.append("C" + " ".join(f"{x},{y}" for x, y in points[i:i + 3]))
+    arrow = [*points[-1], *end] if end is not None else None
+    return "".join(path), arrow
+
+
+def layout_bounds(layout):
+    """
+    Return (width, height) of the layout's bounding box in points.
+    """
+    llx, lly, urx, ury = (float(value) for value in layout["bb"].split(","))
+    return round(urx - llx, 1), round(ury - lly, 1)
+
+
+class LayoutCache:
+    """
+    Holds the layouts of the most recent data versions, computing each at most once.
+    Two are kept so requests still holding the previous catalog while a new one is
+    swapped in do not lay it out again.
+    """
+
+    def __init__(self, keep=2):
+        self.keep = keep
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, data_version, build_graph):
+        """
+        Return the layout for data_version, calling build_graph() to lay it out on a miss.
+        """
+        layout = self._layouts.get(data_version)
+        if layout is not None:
+            return layout
+        with self._lock:
+            layout = self._layouts.get(data_version)
+            if layout is None:
+                layout = capture_layout(build_graph())
+                self._layouts[data_version] = layout
+                while len(self._layouts) > self.keep:
+                    self._layouts.popitem(last=False)
+            return layout
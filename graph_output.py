@@ -0,0 +1,89 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Output formats in order of preference when the client accepts several equally
+FORMATS = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "webp": "image/webp",
+}
+# Gzip-compressed SVG, only produced when asked for by name
+SVGZ = "svgz"
+DEFAULT_FORMAT = "svg"
+
+# Vector output is text and compresses well; rasters are already compressed
+VECTOR_FORMATS = {"svg"}
+
+
+def negotiate_format(accept_mimetypes, requested=None):
+    """
+    Pick the output format: an explicit ?format= wins, otherwise the Accept header
+    decides, preferring SVG on ties.
+    """
+    if requested in FORMATS or requested == SVGZ:
+        return requested
+    if not accept_mimetypes:
+        return DEFAULT_FORMAT
+    best = max(FORMATS, key=lambda format: accept_mimetypes[FORMATS[format]])
+    if accept_mimetypes[FORMATS[best]] <= 0:
+        return DEFAULT_FORMAT
+    return best
+
+
+def negotiate_encoding(accept_encodings, format):
+    """
+    Pick a content encoding for the format: brotli if available and accepted, then gzip.
+    Returns None when the body should be sent as is.
+    """
+    if format not in VECTOR_FORMATS:
+        return None
+    if brotli is not None and accept_encodings["br"] > 0:
+        return "br"
+    if accept_encodings["gzip"] > 0:
+        return "gzip"
+    return None
+
+
+def encodings_for(format):
+    """
+    Return every encoding negotiate_encoding can pick for a format, None included.
+    """
+    if format not in VECTOR_FORMATS:
+        return [None]
+    return [None, "gzip"] + (["br"] if brotli is not None else [])
+
+
+def mimetype_for(format):
+    """
+    Return the Content-Type for a format (SVGZ is served as gzip-encoded SVG).
+    """
+    return FORMATS["svg"] if format == SVGZ else FORMATS[format]
+
+
+def _compressor(encoding):
+    if encoding == "br":
+        compressor = brotli.Compressor()
+        return compressor.process, compressor.finish
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def encode_stream(chunks, encoding):
+    """
+    Compress an iterable of byte chunks incrementally with the given encoding.
+    """
+    if encoding is None:
+        yield from chunks
+        return
+    process, finish = _compressor(encoding)
+    for chunk in chunks:
+        compressed = process(chunk)
+        if compressed:
+            yield compressed
+    yield finish()
+
@@ -0,0 +1,15 @@
+import os
+
+# Production server settings: gunicorn -c gunicorn.conf.py mainweb:app
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Request threads mostly wait on the render pool, so a few processes with
+# several threads each handle plenty of concurrent clients
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("WEB_THREADS", "8"))
+timeout = 60
+
+# Split the CPUs between the render pools of the web workers; each pool queues
+# at most RENDER_QUEUE renders (default 4 per render process) before answering 429
+os.environ.setdefault("RENDER_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+os.environ.setdefault("RENDER_TIMEOUT", "30")
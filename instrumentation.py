@@ -0,0 +1,227 @@
+import bisect
+import contextvars
+import cProfile
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+
+# Seconds; covers cache hits through cold renders of large catalogs
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stage timings of the current request, or None outside a request
+_timings = contextvars.ContextVar("stage_timings", default=None)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        key + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """
+    Prometheus-style cumulative histogram, one series per label combination.
+    """
+
+    def __init__(self, name, help, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in series:
+            labels = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    Counter or gauge whose samples are read from the application when scraped.
+    The callback returns a number, or a list of (labels dict, number) pairs.
+    """
+
+    def __init__(self, name, help, type, callback):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        samples = self.callback()
+        if not isinstance(samples, list):
+            samples = [({}, samples)]
+        for labels, value in samples:
+            lines.append(f"{self.name}{_format_labels(sorted(labels.items()))} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics exposed on /metrics, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.request_seconds = self.add(Histogram(
+            "http_request_duration_seconds", "Time to produce a response, by endpoint.",
+            ("endpoint", "method", "status"),
+        ))
+        self.stage_seconds = self.add(Histogram(
+            "stage_duration_seconds", "Time spent in each stage of handling a request.", ("stage",),
+        ))
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def callback(self, name, help, type, callback):
+        return self.add(CallbackMetric(name, help, type, callback))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a block as one stage of the current request. Stage times feed the
+    stage_duration_seconds histogram and the response's Server-Timing header.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.stage_seconds.observe(elapsed, stage=name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing(timings, total):
+    """
+    Format stage timings as a Server-Timing header value, in milliseconds.
+    Repeated stages are summed.
+    """
+    durations = {}
+    for name, elapsed in timings:
+        durations[name] = durations.get(name, 0.0) + elapsed
+    durations["total"] = total
+    return ", ".join(f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in durations.items())
+
+
+class SlowRequestProfiler:
+    """
+    Profiles a random sample of requests with cProfile and keeps the profiles of
+    those slower than threshold seconds in directory, for `python -m pstats`.
+    Only one request is profiled at a time.
+    """
+
+    def __init__(self, directory, threshold=1.0, sample_rate=0.1):
+        self.directory = directory
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        """
+        Return a running profiler if this request was sampled, else None.
+        """
+        if random.random() >= self.sample_rate or not self._lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (a debugger, or a profiler in another thread) is active
+            self._lock.release()
+            return None
+        return profiler
+
+    def finish(self, profiler, elapsed, label):
+        profiler.disable()
+        try:
+            if elapsed >= self.threshold:
+                name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{elapsed * 1000:.0f}ms-{label}.prof"
+                profiler.dump_stats(os.path.join(self.directory, name))
+        finally:
+            self._lock.release()
+
+
+def instrument(app, profiler=None):
+    """
+    Time every request of a Flask app: request latency histograms, a Server-Timing
+    header with the stages recorded through stage(), and optional slow-request profiles.
+    Time spent streaming a response body after the handler returns is not included.
+    """
+
+    @app.before_request
+    def start_timing():
+        g.request_started = time.perf_counter()
+        _timings.set([])
+        g.profiler = profiler.start() if profiler is not None else None
+
+    @app.after_request
+    def finish_timing(response):
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        timings = _timings.get() or []
+        response.headers["Server-Timing"] = server_timing(timings, elapsed)
+        endpoint = request.endpoint or "unknown"
+        registry.request_seconds.observe(
+            elapsed, endpoint=endpoint, method=request.method, status=str(response.status_code)
+        )
+        running = g.pop("profiler", None)
+        if running is not None:
+            profiler.finish(running, elapsed, endpoint)
+        return response
+
+    @app.teardown_request
+    def reset_timing(exc):
+        running = g.pop("profiler", None)
+        if running is not None:
+            profiler.finish(running, 0.0, "error")
+        _timings.set(None)
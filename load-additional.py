@@ -1,7 +1,14 @@
+import argparse
+import asyncio
 import json
-import requests
-from bs4 import BeautifulSoup
-import re
+import os
+from collections import deque
+
+from course_catalog import catalog_version, save_json
+from scraper import Scraper
+
+# Crawl state saved after every batch so an interrupted run can resume
+CHECKPOINT_FILE = "crawl_checkpoint.json"
 
 def load_data(json_file):
     """
@@ -12,73 +19,147 @@ def load_data(json_file):
 
 def save_data(json_file, data):
     """
-    Save updated course data to a JSON file.
+    Save updated course data to a JSON file, atomically and with a versioned snapshot.
+    Returns the new catalog version.
     """
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    save_json(json_file, data, indent=4)
+    return catalog_version(json_file)
 
-def extract_prerequisites_and_name(course_url):
+def load_checkpoint(checkpoint_file):
     """
-    Fetch the course name and prerequisites from the course URL.
+    Load saved crawl state, or return None if there is no checkpoint.
     """
-    response = requests.get(course_url)
-    prerequisites = []
-    course_name = "Unknown Course"
-
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Extract course name
-        title_tag = soup.find('h1', id='course_title')
-        if title_tag:
-            course_name = title_tag.get_text(strip=True)
-
-        # Search for prerequisites
-        prereq_section = soup.find(string=re.compile(r"ידע קודם דרוש"))
-        if prereq_section:
-            parent = prereq_section.find_parent()
-            if parent:
-                for link in parent.find_all('a', href=True):
-                    course_id = re.search(r'(\d+)\.htm', link['href'])
-                    if course_id:
-                        prerequisites.append(course_id.group(1))
-
-    return course_name, prerequisites
-
-def update_missing_courses(course_data, base_url="https://www.openu.ac.il/courses/"):
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_checkpoint(checkpoint_file, new_courses, frontier, visited, failed=None):
     """
-    Identify missing courses, fetch their details, and update the course data.
+    Atomically save crawl state so an interrupted crawl can resume where it stopped.
+    Only the courses fetched by the crawl are saved, not the whole course data, so
+    resuming merges them into the JSON as it is then. Courses whose fetch failed are
+    saved apart from them, with their depth, to be fetched again on resume.
     """
-    all_course_ids = set(course_data.keys())
-    prerequisite_ids = {
-        prereq for details in course_data.values() for prereq in details["prerequisites"]
+    state = {
+        "fetched": new_courses,
+        "failed": list((failed or {}).items()),
+        "frontier": list(frontier),
+        "visited": sorted(visited),
     }
-    missing_ids = prerequisite_ids - all_course_ids
+    tmp_file = f"{checkpoint_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_file, checkpoint_file)
+
+def missing_prerequisites(details, visited):
+    """
+    Return prerequisites of a course that have not been seen yet, in order.
+    """
+    return [prereq for prereq in dict.fromkeys(details["prerequisites"]) if prereq not in visited]
+
+async def crawl_missing_courses(course_data, base_url, max_depth=None, max_courses=None,
+                                checkpoint_file=None, batch_size=64, **scraper_options):
+    """
+    Breadth-first crawl of missing prerequisites until no course references an unknown one.
+    max_depth limits how many prerequisite levels are followed and max_courses how many
+    pages are fetched. State is checkpointed after every batch.
 
-    for course_id in missing_ids:
-        print(f"Fetching details for missing course: {course_id}")
-        course_url = f"{base_url}{course_id}.htm"
-        course_name, prerequisites = extract_prerequisites_and_name(course_url)
+    Courses whose page cannot be fetched are left out of course_data rather than
+    stored as placeholders. The checkpoint is then kept after the crawl, and resuming
+    from it fetches them again; without one, the next run finds them missing again.
 
-        # Add the missing course to the data
-        course_data[course_id] = {
-            "name": course_name,
-            "prerequisites": prerequisites
-        }
+    On resume, the checkpointed courses are merged into course_data. Courses the
+    JSON has since gained keep the JSON's version, and prerequisites that edits to
+    the JSON introduced are added to the frontier.
+    """
+    new_courses = {}
+    failed = {}
+    visited = set(course_data)
+    frontier = deque()
+    state = load_checkpoint(checkpoint_file)
+    if state is not None:
+        print(f"Resuming crawl from {checkpoint_file}")
+        # Checkpoints written before "fetched" held the whole course data
+        for course_id, details in state.get("fetched", state.get("course_data", {})).items():
+            if course_id not in course_data:
+                course_data[course_id] = new_courses[course_id] = details
+        visited.update(course_data, state["visited"])
+        frontier.extend(
+            tuple(entry) for entry in state["frontier"] + state.get("failed", [])
+            if entry[0] not in course_data
+        )
+    for details in list(course_data.values()):
+        for prereq in missing_prerequisites(details, visited):
+            visited.add(prereq)
+            frontier.append((prereq, 1))
+
+    fetched = 0
+    async with Scraper(**scraper_options) as scraper:
+        while frontier and (max_courses is None or fetched < max_courses):
+            limit = batch_size if max_courses is None else min(batch_size, max_courses - fetched)
+            batch = [frontier.popleft() for _ in range(min(limit, len(frontier)))]
+
+            course_links = {}
+            for course_id, depth in batch:
+                print(f"Fetching details for missing course: {course_id} (depth {depth})")
+                course_links[course_id] = f"{base_url}{course_id}.htm"
+            results = await scraper.scrape_courses(course_links)
+            fetched += len(batch)
+
+            for course_id, depth in batch:
+                details = results.get(course_id)
+                if details is None or course_links[course_id] in scraper.failed_urls:
+                    failed[course_id] = depth
+                    continue
+                course_data[course_id] = new_courses[course_id] = details
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                for prereq in missing_prerequisites(details, visited):
+                    visited.add(prereq)
+                    frontier.append((prereq, depth + 1))
+
+            if checkpoint_file:
+                save_checkpoint(checkpoint_file, new_courses, frontier, visited, failed)
 
+    if frontier:
+        print(f"Budget reached with {len(frontier)} courses left in the frontier")
+    elif failed:
+        print(f"{len(failed)} courses could not be fetched and were left out; run again to retry them")
+    elif checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
     return course_data
 
+def update_missing_courses(course_data, base_url="https://www.openu.ac.il/courses/", max_depth=None,
+                           max_courses=None, checkpoint_file=None):
+    """
+    Identify missing courses, fetch their details, and update the course data.
+    Newly fetched courses are followed too, so one run reaches a fixed point.
+    """
+    return asyncio.run(crawl_missing_courses(
+        course_data, base_url, max_depth, max_courses, checkpoint_file
+    ))
+
 def main():
+    parser = argparse.ArgumentParser(description="Fetch all transitively missing prerequisite courses.")
+    parser.add_argument("--max-depth", type=int, help="Prerequisite levels to follow")
+    parser.add_argument("--max-courses", type=int, help="Course pages to fetch in this run")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="Crawl state file for resuming")
+    args = parser.parse_args()
+
     # Load the JSON file
     json_file = "course_dependencies_with_names.json"
     course_data = load_data(json_file)
 
     # Update missing courses
-    updated_course_data = update_missing_courses(course_data)
+    updated_course_data = update_missing_courses(
+        course_data, max_depth=args.max_depth, max_courses=args.max_courses,
+        checkpoint_file=args.checkpoint,
+    )
 
     # Save the updated data back to the JSON file
-    save_data(json_file, updated_course_data)
-    print(f"Updated course data saved to {json_file}")
+    version = save_data(json_file, updated_course_data)
+    print(f"Updated course data saved to {json_file} (catalog version {version})")
 
 if __name__ == "__main__":
     main()
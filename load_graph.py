@@ -1,36 +1,47 @@
-import ijson
 import networkx as nx
 import matplotlib.pyplot as plt
 
+from course_stream import iter_courses
+
 def load_dependency_graph_incrementally(json_file):
     """
-    Load a dependency graph incrementally from a JSON file.
+    Load a dependency graph incrementally from a JSON file, one course at a time.
     """
     graph = nx.DiGraph()
 
-    with open(json_file, 'r', encoding='utf-8') as f:
-        # Incrementally parse the JSON file
-        parser = ijson.items(f, 'item')
-        
-        for course_id, data in ijson.kvitems(f, ''):
-            course_name = data.get("name", f"Course {course_id}")
-            prerequisites = data.get("prerequisites", [])
-
-            # Add the course to the graph
-            graph.add_node(course_id, label=course_name)
+    for course in iter_courses(json_file):
+        # Add the course to the graph, replacing any placeholder label
+        graph.add_node(course.course_id, label=course.name)
 
-            # Add edges for prerequisites
-            for prereq in prerequisites:
-                graph.add_edge(prereq, course_id)
+        # Add edges for prerequisites, labeling prerequisites not seen yet
+        for prereq in course.prerequisites:
+            if prereq not in graph:
+                graph.add_node(prereq, label=f"Course {prereq}")
+            graph.add_edge(prereq, course.course_id)
 
     return graph
 
-def visualize_graph(graph, max_nodes=None):
+def focus_nodes(graph, focus=None, hops=None, max_nodes=None):
+    """
+    Select the courses around focus courses: their prerequisites and dependents within
+    hops steps, nearest first, up to max_nodes courses. Without focus courses the view
+    starts from the courses that have no prerequisites and follows what they unlock.
+    """
+    focus = [node for node in focus or () if node in graph]
+    if not focus:
+        focus = [node for node, degree in graph.in_degree() if degree == 0]
+    distance = nx.multi_source_dijkstra_path_length(graph.to_undirected(as_view=True), focus, cutoff=hops)
+    order = {node: position for position, node in enumerate(graph)}
+    nearest = sorted(distance, key=lambda node: (distance[node], order[node]))
+    return nearest[:max_nodes] if max_nodes else nearest
+
+def visualize_graph(graph, max_nodes=None, focus=None, hops=None):
     """
-    Visualize a dependency graph with an optional limit on the number of nodes.
+    Visualize a dependency graph, optionally only the courses around focus courses
+    and at most max_nodes of them, nearest first.
     """
-    if max_nodes and len(graph.nodes) > max_nodes:
-        subgraph = graph.subgraph(list(graph.nodes)[:max_nodes])
+    if focus or hops is not None or (max_nodes and len(graph.nodes) > max_nodes):
+        subgraph = graph.subgraph(focus_nodes(graph, focus, hops, max_nodes))
     else:
         subgraph = graph
 
@@ -1,10 +1,12 @@
-import ijson
 import networkx as nx
 import matplotlib.pyplot as plt
 from bidi.algorithm import get_display
 from networkx.drawing.nx_agraph import graphviz_layout
 import plotly.graph_objects as go
 
+from course_stream import iter_courses
+from load_graph import focus_nodes
+
 def format_label(text):
     """
     Correct Hebrew text for proper display.
@@ -14,38 +16,30 @@ def format_label(text):
 
 def load_dependency_graph_incrementally(json_file):
     """
-    Load a dependency graph incrementally from a JSON file.
+    Load a dependency graph incrementally from a JSON file, one course at a time.
     """
     graph = nx.DiGraph()
 
-    with open(json_file, 'r', encoding='utf-8') as f:
-        for course_id, data in ijson.kvitems(f, ''):
-            course_name = format_label(data.get("name", f"Course {course_id}"))
-            prerequisites = data.get("prerequisites", [])
-
-            # Add the course to the graph
-            graph.add_node(course_id, label=course_name)
-
-            # Add edges for prerequisites
-            for prereq in prerequisites:
-                graph.add_edge(prereq, course_id)
+    for course in iter_courses(json_file):
+        # Add the course to the graph, replacing any placeholder label
+        graph.add_node(course.course_id, label=format_label(course.name))
 
-    # Debug: Ensure every node has a label
-    for node in graph.nodes(data=True):
-        if 'label' not in node[1]:
-            print(f"Warning: Node {node[0]} is missing a label!")
-            graph.nodes[node[0]]['label'] = f"Course {node[0]}"  # Fallback label
+        # Prerequisites not seen yet get a fallback label until their own record arrives
+        for prereq in course.prerequisites:
+            if prereq not in graph:
+                graph.add_node(prereq, label=f"Course {prereq}")
+            graph.add_edge(prereq, course.course_id)
 
     return graph
 
 
-def visualize_graph(graph, max_nodes=None):
+def visualize_graph(graph, max_nodes=None, focus=None, hops=None):
     return
     """
     Visualize a dependency graph using PyGraphviz for better layout.
     """
-    if max_nodes and len(graph.nodes) > max_nodes:
-        subgraph = graph.subgraph(list(graph.nodes)[:max_nodes])
+    if focus or hops is not None or (max_nodes and len(graph.nodes) > max_nodes):
+        subgraph = graph.subgraph(focus_nodes(graph, focus, hops, max_nodes))
     else:
         subgraph = graph
 
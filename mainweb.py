@@ -1,20 +1,68 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, request, jsonify, send_file, send_from_directory, Response, stream_with_context
+import io
 import os
-import json
 import pygraphviz as pgv
 from io import BytesIO
 
-from use3party_withoverlap import generate_graphv2
+from use3party_withoverlap import (
+    FocusView, generate_graphv2, layout_payload, layout_status, stream_graphv2, warm_up,
+)
+from graph_output import (
+    SVGZ, VECTOR_FORMATS, encode_stream, mimetype_for, negotiate_encoding, negotiate_format
+)
+from course_catalog import CatalogVersionError, catalog_store, get_catalog
+from batch_eligibility import evaluate_students, read_students_csv, read_students_jsonl, results_jsonl
+from course_plan import DEFAULT_MAX_PER_SEMESTER, PlanCache
+from render_cache import RenderCache, cache_key, render_variant
+from render_pool import RenderPool, RenderPoolFull, RenderTimeout
+from instrumentation import SlowRequestProfiler, instrument, registry, stage
 
 app = Flask(__name__)
 
-# Load course data
-COURSE_FILE = "course_dependencies_with_names.json"
-OVERLAP_FILE = "final_overlapping_groups.json"
-with open(COURSE_FILE, "r", encoding="utf-8") as f:
-    course_data = json.load(f)
-with open(OVERLAP_FILE, "r", encoding="utf-8") as f:
-    overlapping_groups = json.load(f)
+# Load course data once. When the data files are replaced, the new version is loaded
+# and laid out in the background, then swapped in; until then the old one is served.
+catalog_store().prepare.append(warm_up)
+catalog_store().watch()
+
+# Rendered images, optionally persisted to RENDER_CACHE_DIR across restarts, keeping at
+# most RENDER_CACHE_MAX_MB there and, with RENDER_CACHE_MAX_DAYS, nothing older than that
+render_cache_days = os.environ.get("RENDER_CACHE_MAX_DAYS")
+render_cache = RenderCache(
+    disk_dir=os.environ.get("RENDER_CACHE_DIR"),
+    max_disk_bytes=int(float(os.environ.get("RENDER_CACHE_MAX_MB", "1024")) * 1024 * 1024),
+    max_disk_age=float(render_cache_days) * 86400 if render_cache_days else None,
+)
+
+# With RENDER_WORKERS set (see gunicorn.conf.py), renders run in a bounded process
+# pool; otherwise they run in the request thread and SVG is streamed as it is drawn
+render_workers = int(os.environ.get("RENDER_WORKERS", "0"))
+render_pool = RenderPool(
+    render_workers,
+    max_pending=int(os.environ.get("RENDER_QUEUE", "0")) or None,
+    timeout=float(os.environ.get("RENDER_TIMEOUT", "30")),
+) if render_workers else None
+
+# Request latency histograms and Server-Timing headers; with PROFILE_DIR set, a sample
+# of requests is profiled and those slower than PROFILE_SLOW_MS are saved there
+profile_dir = os.environ.get("PROFILE_DIR")
+instrument(app, SlowRequestProfiler(
+    profile_dir,
+    threshold=float(os.environ.get("PROFILE_SLOW_MS", "1000")) / 1000,
+    sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0.1")),
+) if profile_dir else None)
+
+registry.callback("render_cache_hits_total", "Rendered images served from the render cache.", "counter",
+                  lambda: render_cache.hits)
+registry.callback("render_cache_misses_total", "Render cache lookups that found nothing.", "counter",
+                  lambda: render_cache.misses)
+registry.callback("render_queue_depth", "Renders running or waiting in the render pool.", "gauge",
+                  lambda: render_pool.depth if render_pool else 0)
+registry.callback("render_pool_requests_total", "Render pool requests, by outcome.", "counter", lambda: [
+    ({"outcome": outcome}, getattr(render_pool, outcome) if render_pool else 0)
+    for outcome in ("rendered", "coalesced", "rejected", "timed_out")
+])
+registry.callback("catalog_info", "The catalog version being served.", "gauge",
+                  lambda: [({"version": get_catalog().version}, 1)])
 
 @app.route('/')
 def index():
@@ -25,45 +73,204 @@ def index():
 @app.route('/get_courses', methods=['GET'])
 def get_courses():
     """Serve the course data."""
-    return jsonify(course_data)
+    catalog = get_catalog()
+    response = Response(catalog.courses_json, mimetype="application/json")
+    response.set_etag(catalog.version)
+    return response.make_conditional(request)
+
+@app.route('/catalog_version', methods=['GET'])
+def catalog_version():
+    """Return the content hash of the catalog being served, as used in cache keys and ETags."""
+    return jsonify({"version": get_catalog().version})
+
+def requested_courses():
+    """Read the completed courses from a JSON body or a comma-separated query parameter."""
+    if request.method == 'POST':
+        return request.json.get('completed_courses', [])
+    return [c for c in request.args.get('completed_courses', '').split(',') if c]
+
+def requested_focus():
+    """
+    Read an optional focus view (view, focus courses and hops) from a JSON body or the
+    query string. Returns None to draw the whole catalog; raises ValueError if invalid.
+    """
+    if request.method == 'POST':
+        view, focus, hops = (request.json.get(name) for name in ('view', 'focus', 'hops'))
+    else:
+        view = request.args.get('view')
+        focus = [c for c in request.args.get('focus', '').split(',') if c]
+        hops = request.args.get('hops')
+    if not view:
+        return None
+    if hops is not None and hops != '':
+        try:
+            hops = int(hops)
+        except (TypeError, ValueError):
+            raise ValueError("hops must be an integer") from None
+    else:
+        hops = None
+    return FocusView(view, tuple(focus or ()), hops)
+
+@app.route('/graph_layout', methods=['GET', 'POST'])
+def graph_layout():
+    """Return the precomputed layout and course statuses for rendering in the browser."""
+    completed_courses = requested_courses()
+    catalog = get_catalog()
+    etag = cache_key(completed_courses, "layout", catalog.version)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        payload = dict(layout_payload(catalog))
+        payload["status"] = layout_status(catalog, completed_courses)
+        response = jsonify(payload)
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+plan_cache = PlanCache()
+
+@app.route('/plan', methods=['GET', 'POST'])
+def plan():
+    """
+    Return topological levels, the longest remaining prerequisite chain and a
+    semester schedule for the completed courses, optionally limited to target courses.
+    """
+    completed_courses = requested_courses()
+    if request.method == 'POST':
+        targets = request.json.get('targets', [])
+        max_per_semester = request.json.get('max_per_semester', DEFAULT_MAX_PER_SEMESTER)
+    else:
+        targets = [c for c in request.args.get('targets', '').split(',') if c]
+        max_per_semester = request.args.get('max_per_semester', DEFAULT_MAX_PER_SEMESTER)
+    try:
+        max_per_semester = int(max_per_semester)
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_per_semester must be an integer"}), 400
 
-@app.route('/generate_graph', methods=['POST'])
+    catalog = get_catalog()
+    variant = f"plan:{max_per_semester}:{','.join(sorted(set(targets)))}"
+    etag = cache_key(completed_courses, variant, catalog.version)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(plan_cache.get(catalog, completed_courses, targets, max_per_semester))
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.route('/batch_eligibility', methods=['POST'])
+def batch_eligibility():
+    """
+    Evaluate many completed-course sets at once, without rendering anything.
+    Takes JSON lines or CSV, as the request body or an uploaded file, and streams
+    back one JSON line per student with the next courses and the courses that are
+    one prerequisite short; with unmet=1, also every unmet prerequisite.
+    """
+    upload = next(iter(request.files.values()), None)
+    if upload is not None:
+        stream, filename, content_type = upload.stream, upload.filename or "", upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, "", request.mimetype
+    is_csv = filename.lower().endswith(".csv") or content_type in ("text/csv", "application/csv")
+    # utf-8-sig drops the byte order mark spreadsheet exports start with
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    students = read_students_csv(lines) if is_csv else read_students_jsonl(lines)
+
+    catalog = get_catalog()
+    unmet = request.args.get('unmet', '').lower() in ('1', 'true', 'yes')
+    results = results_jsonl(evaluate_students(catalog.graph, students, unmet=unmet))
+    response = Response(stream_with_context(results), mimetype="application/x-ndjson")
+    response.headers["X-Catalog-Version"] = catalog.version
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Expose request latency, cache and render pool metrics in the Prometheus text format."""
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+def busy_response(status, message):
+    """Tell the client to back off and retry a render later."""
+    response = Response(message, status=status, mimetype="text/plain")
+    response.headers["Retry-After"] = "1"
+    return response
+
+def cache_while_streaming(key, chunks):
+    """Pass chunks through to the client and store the full body once the stream completes."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    render_cache.put(key, b"".join(parts))
+
+@app.route('/generate_graph', methods=['GET', 'POST'])
 def generate_graph():
-    """Generate and return the graph image."""
-    completed_courses = request.json.get('completed_courses', [])
-
-    img_data = BytesIO()
-    generate_graphv2(completed_courses, img_data, format="png")
-    img_data.seek(0)
-    return send_file(img_data, mimetype="image/png")
-
-def incorporate_overlapping_courses(course_data, overlapping_groups, completed_courses):
-    """Filter course data based on overlapping courses and completed courses."""
-    overlap_map = {}
-    for group in overlapping_groups:
-        for course in group:
-            if overlap_map.get(course):
-                overlap_map[course].update(group)
-            else:
-                overlap_map[course] = set(group)
-
-    filtered_course_data = {}
-    for course_id, details in course_data.items():
-        prerequisites = details["prerequisites"]
-        filtered_prereqs = set()
-        for prereq in prerequisites:
-            if prereq in completed_courses:
-                filtered_prereqs.add(prereq)
-            else:
-                if prereq in overlap_map and overlap_map[prereq].intersection(completed_courses):
-                    continue
-                else:
-                    filtered_prereqs.add(prereq)
-        filtered_course_data[course_id] = {
-            "name": details["name"],
-            "prerequisites": list(filtered_prereqs),
-        }
-    return filtered_course_data
+    """
+    Generate and return the graph image in the format chosen by the Accept header
+    (SVG by default), served from the render cache when possible. With view=ancestors,
+    descendants, neighborhood or frontier only that part of the catalog is drawn.
+    """
+    completed_courses = requested_courses()
+    try:
+        focus = requested_focus()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    format = negotiate_format(request.accept_mimetypes, request.args.get('format'))
+    encoding = negotiate_encoding(request.accept_encodings, format)
+    mimetype = mimetype_for(format)
+
+    catalog = get_catalog()
+    etag = cache_key(completed_courses, render_variant(format, encoding, focus), catalog.version)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        with stage("cache"):
+            img, disk_file = render_cache.lookup(etag)
+        if img is not None:
+            response = Response(img, mimetype=mimetype)
+        elif disk_file is not None:
+            # Pre-rendered by warm_cache.py or an earlier process; the server can sendfile it.
+            # The file is already open, so pruning it now cannot fail the response.
+            response = send_file(disk_file, mimetype=mimetype, etag=False, conditional=False, max_age=None)
+            response.content_length = os.fstat(disk_file.fileno()).st_size
+        elif render_pool is not None:
+            # Coalesce on the uncompressed render; each client gets its own encoding
+            render_key = cache_key(completed_courses, render_variant(format, focus=focus), catalog.version)
+            try:
+                with stage("render_pool"):
+                    img = render_pool.render(render_key, completed_courses, format, focus, catalog.version)
+            except RenderPoolFull:
+                return busy_response(429, "Too many graphs are being rendered, try again shortly")
+            except RenderTimeout:
+                return busy_response(503, "Rendering the graph took too long, try again shortly")
+            except CatalogVersionError:
+                # The course data changed between this request and the render
+                return busy_response(503, "The course data is being updated, try again shortly")
+            with stage("encode"):
+                img = b"".join(encode_stream([img], encoding))
+            render_cache.put(etag, img)
+            response = Response(img, mimetype=mimetype)
+        elif format in VECTOR_FORMATS:
+            # Stream vector output to the client as Graphviz writes it
+            chunks = encode_stream(stream_graphv2(completed_courses, format, catalog, focus), encoding)
+            response = Response(cache_while_streaming(etag, chunks), mimetype=mimetype)
+        else:
+            img_data = BytesIO()
+            generate_graphv2(completed_courses, img_data, format=format, catalog=catalog, focus=focus)
+            img = img_data.getvalue()
+            render_cache.put(etag, img)
+            response = Response(img, mimetype=mimetype)
+
+        content_encoding = "gzip" if format == SVGZ else encoding
+        if content_encoding:
+            response.headers["Content-Encoding"] = content_encoding
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.update(("Accept", "Accept-Encoding"))
+    return response
 
 if __name__ == "__main__":
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
     app.run(debug=True)
@@ -0,0 +1,133 @@
+from functools import cached_property
+
+
+class OverlapIndex:
+    """
+    Overlapping-course lookup built once from the overlapping groups.
+
+    Duplicate groups are dropped and every remaining group gets an integer ID.
+    Union-find merges groups that share courses into equivalence classes with
+    their own integer IDs. Each course maps to a bitmask: the bits of the groups
+    it belongs to, or with transitive=True the bit of its class. A completed-course
+    set becomes the OR of those masks, so "is an equivalent course completed?" is a
+    single AND per prerequisite.
+
+    The default (transitive=False) matches the original overlap_map behaviour,
+    where only courses sharing a group with the prerequisite count. Chaining
+    groups transitively would, for example, let Calculus 1 satisfy Calculus 2.
+    """
+
+    def __init__(self, overlapping_groups, transitive=False):
+        groups = self._unique_groups(overlapping_groups)
+        parent = {}
+
+        def find(course):
+            while parent[course] != course:
+                parent[course] = parent[parent[course]]  # Path halving
+                course = parent[course]
+            return course
+
+        for group in groups:
+            for course in group:
+                parent.setdefault(course, course)
+            root = find(group[0])
+            for course in group[1:]:
+                other = find(course)
+                if other != root:
+                    parent[other] = root
+
+        # Number classes in order of their smallest course ID for stable output
+        class_ids = {}
+        class_of = {}
+        for course in sorted(parent):
+            root = find(course)
+            if root not in class_ids:
+                class_ids[root] = len(class_ids)
+            class_of[course] = class_ids[root]
+        self._set_classes(groups, class_of, transitive)
+
+    @classmethod
+    def from_classes(cls, overlapping_groups, class_of, transitive=False):
+        """
+        Build the index from groups and the class IDs an earlier index computed for
+        them (its class_of), skipping the union-find. Used to load compiled catalogs.
+        """
+        index = cls.__new__(cls)
+        index._set_classes(cls._unique_groups(overlapping_groups), class_of, transitive)
+        return index
+
+    @staticmethod
+    def _unique_groups(overlapping_groups):
+        # Deduplicate groups regardless of member order
+        return [
+            tuple(sorted(group))
+            for group in dict.fromkeys(frozenset(group) for group in overlapping_groups)
+        ]
+
+    def _set_classes(self, groups, class_of, transitive):
+        classes = [[] for _ in range(max(class_of.values(), default=-1) + 1)]
+        for course in sorted(class_of):
+            classes[class_of[course]].append(course)
+
+        self.transitive = transitive
+        self.groups = tuple(groups)
+        self.classes = tuple(tuple(members) for members in classes)
+        self.class_of = class_of
+
+    @property
+    def bit_members(self):
+        """
+        The courses each mask bit stands for: the groups, or with transitive=True the classes.
+        """
+        return self.classes if self.transitive else self.groups
+
+    @cached_property
+    def course_mask(self):
+        """
+        {course: bitmask of its groups, or of its class}, built on first use.
+        """
+        course_mask = {}
+        for bit, members in enumerate(self.bit_members):
+            for course in members:
+                course_mask[course] = course_mask.get(course, 0) | (1 << bit)
+        return course_mask
+
+    def equivalents(self, course):
+        """
+        Return all courses that can stand in for the given one, including itself.
+        """
+        mask = self.course_mask.get(course)
+        if mask is None:
+            return (course,)
+        if self.transitive:
+            return self.classes[self.class_of[course]]
+        return tuple(sorted({
+            member
+            for group_id, group in enumerate(self.groups) if (mask >> group_id) & 1
+            for member in group
+        }))
+
+    def completed_mask(self, completed_courses):
+        """
+        Return the OR of the masks of all completed courses.
+        """
+        mask = 0
+        course_mask = self.course_mask
+        for course in completed_courses:
+            mask |= course_mask.get(course, 0)
+        return mask
+
+    def is_satisfied(self, course, completed_mask):
+        """
+        Check whether a course equivalent to the given one is in the completed mask.
+        """
+        return self.course_mask.get(course, 0) & completed_mask != 0
+
+
+def as_overlap_index(overlapping_groups):
+    """
+    Accept either raw overlapping groups or an already built OverlapIndex.
+    """
+    if isinstance(overlapping_groups, OverlapIndex):
+        return overlapping_groups
+    return OverlapIndex(overlapping_groups)
@@ -0,0 +1,161 @@
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass
+
+from course_catalog import OVERLAP_FILE, catalog_version, save_json
+from overlap_index import OverlapIndex
+
+OVERLAP_TEXT_FILE = "overlapping.txt"
+
+# Table rows have these tab-separated columns; other lines are notes
+COLUMNS = 7
+# A year followed by the Hebrew semester letter: א (autumn), ב (spring) or ג (summer)
+SEMESTER = re.compile(r"(\d{4})([אבג])")
+# In the group column, "-" separates alternatives within the same group
+GROUP_CONTINUATION = "-"
+
+
+@dataclass(frozen=True, slots=True)
+class OverlapRow:
+    """
+    One course row of overlapping.txt. group is the group number on the row that
+    starts a group, "-" between alternatives of a group, and empty otherwise.
+    """
+    group: str
+    credits: float
+    from_semester: str
+    until_semester: str
+    name: str
+    course_id: str
+
+
+def parse_semester(text):
+    """
+    Return a semester code such as 2021ג without surrounding spaces, or None if the
+    cell is empty. Raises ValueError for anything else.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    if not SEMESTER.fullmatch(text):
+        raise ValueError(f"not a semester code: {text!r}")
+    return text
+
+
+def semester_key(code):
+    """
+    Sort key for semester codes: year, then א, ב, ג.
+    """
+    year, letter = SEMESTER.fullmatch(code).groups()
+    return int(year), "אבג".index(letter)
+
+
+def iter_rows(lines):
+    """
+    Yield an OverlapRow per table row of overlapping.txt, one line at a time.
+    Notes and blank lines are skipped; a row with a malformed cell raises ValueError
+    naming its line.
+    """
+    for line_number, line in enumerate(lines, 1):
+        cells = line.rstrip("\r\n").split("\t")
+        if len(cells) < COLUMNS:
+            continue
+        try:
+            yield OverlapRow(
+                cells[0].strip(),
+                float(cells[1]),
+                parse_semester(cells[2]),
+                parse_semester(cells[3]),
+                cells[4].strip(),
+                cells[6].strip(),
+            )
+        except ValueError as e:
+            raise ValueError(f"line {line_number}: {e}") from None
+
+
+def iter_groups(rows):
+    """
+    Yield each overlapping group as a tuple of course IDs in file order. A group
+    number starts a group; rows without a course ID are left out.
+    """
+    group = None
+    for row in rows:
+        if row.group and row.group != GROUP_CONTINUATION:
+            if group:
+                yield tuple(group)
+            group = []
+        if group is not None and row.course_id:
+            group.append(row.course_id)
+    if group:
+        yield tuple(group)
+
+
+def normalize_groups(groups):
+    """
+    Reduce overlapping groups to the fewest that mean the same: members deduplicated
+    and sorted, groups of one course, repeated groups and groups contained in another
+    group dropped, the rest sorted. A course's equivalents are the union of its
+    groups, so none of this changes which courses stand in for which.
+    """
+    unique = {frozenset(group) for group in groups if len(set(group)) > 1}
+    maximal = [group for group in unique if not any(group < other for other in unique)]
+    return sorted(sorted(group) for group in maximal)
+
+
+def compact_index(groups, transitive=False):
+    """
+    Describe the overlap index of normalized groups compactly: the sorted course IDs,
+    and the groups and union-find equivalence classes as positions in that list.
+    """
+    overlap_index = OverlapIndex(groups, transitive)
+    courses = sorted(overlap_index.class_of)
+    position = {course: i for i, course in enumerate(courses)}
+    return {
+        "courses": courses,
+        "groups": [[position[course] for course in group] for group in overlap_index.groups],
+        "classes": [[position[course] for course in members] for members in overlap_index.classes],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the overlapping groups file from overlapping.txt.")
+    parser.add_argument("source", nargs="?", default=OVERLAP_TEXT_FILE)
+    parser.add_argument("--output", default=OVERLAP_FILE)
+    parser.add_argument("--transitive", action="store_true",
+                        help="merge groups that share a course into one equivalence class each")
+    parser.add_argument("--index", help="also write the compact overlap index JSON here")
+    parser.add_argument("--check", action="store_true",
+                        help="only report whether the output file means the same as the source")
+    args = parser.parse_args()
+
+    with open(args.source, "r", encoding="utf-8-sig") as f:
+        raw_groups = list(iter_groups(iter_rows(f)))
+    groups = normalize_groups(raw_groups)
+    if args.transitive:
+        groups = [list(members) for members in OverlapIndex(groups).classes]
+    index = compact_index(groups)
+    print(f"{len(raw_groups)} groups in {args.source}, {len(groups)} after normalizing, "
+          f"{len(index['classes'])} equivalence classes over {len(index['courses'])} courses")
+
+    if args.check:
+        with open(args.output, "r", encoding="utf-8") as f:
+            current = normalize_groups(json.load(f))
+        if current != groups:
+            print(f"{args.output} differs from {args.source}")
+            return 1
+        print(f"{args.output} matches {args.source}")
+        return 0
+
+    save_json(args.output, groups, indent=4)
+    version = catalog_version(overlap_file=args.output)
+    print(f"Overlapping groups saved to {args.output} (catalog version {version})")
+    if args.index:
+        save_json(args.index, index, snapshot_dir=None, separators=(",", ":"))
+        print(f"Overlap index saved to {args.index}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from atomic_files import atomic_write
+
+# Temp files being written into the disk tier; prune_disk only removes stale ones
+TEMP_PREFIX = ".tmp-"
+STALE_TEMP_AGE = 3600
+
+
+def cache_key(completed_courses, format, data_version):
+    """
+    Build a render cache key from the sorted, deduplicated completed-course set,
+    the output format and the data version. The key doubles as the response ETag.
+    """
+    canonical = ",".join(sorted(set(completed_courses)))
+    raw = f"{data_version}|{format}|{canonical}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def render_variant(format, encoding=None, focus=None):
+    """
+    Describe a rendered variant for cache_key: the output format, the FocusView
+    if only part of the catalog is drawn, and the content encoding if compressed.
+    """
+    variant = format if focus is None else f"{format}|{focus.variant}"
+    return variant if encoding is None else f"{variant}+{encoding}"
+
+
+class RenderCache:
+    """
+    LRU cache of rendered graph bytes, bounded by entry count and total size,
+    with an optional on-disk tier that survives restarts.
+
+    On disk each render is a file named after its key, which already addresses
+    everything that determines the image, in a subdirectory per first two hex
+    digits. The warm_cache command fills the same layout ahead of time.
+
+    Renders of old catalog versions are never looked up again, so the disk tier
+    can be bounded by max_disk_bytes and max_disk_age (seconds). Disk hits refresh
+    a file's modification time, and prune_disk removes files older than
+    max_disk_age, then the least recently used ones until the rest fit in
+    max_disk_bytes. It runs on start-up and whenever a tenth of max_disk_bytes
+    has been written since the last run.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=128 * 1024 * 1024, disk_dir=None,
+                 max_disk_bytes=None, max_disk_age=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_disk_age = max_disk_age
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._written = 0
+        self._prune_lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.prune_disk()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def lookup(self, key):
+        """
+        Find a render without reading it from disk. Returns (data, None) on a memory
+        hit, (None, file) when only the disk tier has it, and (None, None) on a miss,
+        so disk hits can be sent straight from the file. The file is returned open, so
+        pruning cannot remove it before it is sent; the caller closes it.
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data, None
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                disk_file = open(path, "rb")
+            except FileNotFoundError:
+                disk_file = None
+            if disk_file is not None:
+                self._touch(path)
+                with self._lock:
+                    self.hits += 1
+                return None, disk_file
+
+        with self._lock:
+            self.misses += 1
+        return None, None
+
+    def on_disk(self, key):
+        """
+        Check whether the disk tier holds a render, without counting a hit or miss.
+        """
+        return bool(self.disk_dir) and os.path.isfile(self._disk_path(key))
+
+    def get(self, key):
+        """
+        Return cached bytes for the key, or None on a miss.
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                data = None
+            if data is not None:
+                self._touch(self._disk_path(key))
+                self._remember(key, data)
+                with self._lock:
+                    self.hits += 1
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, data):
+        """
+        Store rendered bytes in memory and, if configured, on disk.
+        """
+        self._remember(key, data)
+        if self.disk_dir:
+            self.write_disk(key, data)
+
+    def write_disk(self, key, data):
+        """
+        Store rendered bytes in the disk tier only.
+        """
+        path = self._disk_path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Renamed into place so readers never see a partial image; a lost render is
+        # only re-rendered, so it is not synced to disk
+        atomic_write(path, data, prefix=TEMP_PREFIX, sync=False)
+
+        if self.max_disk_bytes is not None:
+            with self._lock:
+                self._written += len(data)
+                due = self._written * 10 >= self.max_disk_bytes
+                if due:
+                    self._written = 0
+            if due:
+                self.prune_disk()
+
+    @staticmethod
+    def _touch(path):
+        # Mark a disk hit as recently used; False if the file is gone
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def prune_disk(self):
+        """
+        Remove disk tier files past max_disk_age, then the least recently used
+        ones until the rest fit in max_disk_bytes. Returns the number removed.
+        Skipped if another thread is already pruning.
+        """
+        if not self.disk_dir or (self.max_disk_bytes is None and self.max_disk_age is None):
+            return 0
+        if not self._prune_lock.acquire(blocking=False):
+            return 0
+        try:
+            files = []
+            now = time.time()
+            for subdir in os.scandir(self.disk_dir):
+                if subdir.is_dir():
+                    for entry in os.scandir(subdir.path):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        if entry.name.startswith(TEMP_PREFIX) and now - stat.st_mtime < STALE_TEMP_AGE:
+                            continue
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+            files.sort()
+
+            expired = 0
+            if self.max_disk_age is not None:
+                cutoff = now - self.max_disk_age
+                while expired < len(files) and files[expired][0] < cutoff:
+                    expired += 1
+            total = sum(size for _, size, _ in files[expired:])
+            end = expired
+            if self.max_disk_bytes is not None:
+                while end < len(files) and total > self.max_disk_bytes:
+                    total -= files[end][1]
+                    end += 1
+
+            removed = 0
+            for _, _, path in files[:end]:
+                try:
+                    os.unlink(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            return removed
+        finally:
+            self._prune_lock.release()
+
+    def _remember(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        """
+        Drop all in-memory entries (the disk tier is left untouched).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from use3party_withoverlap import render_graphv2, warm_up
+
+
+class RenderPoolFull(Exception):
+    """
+    Raised when the render queue is at capacity and the request should be shed.
+    """
+
+
+class RenderTimeout(Exception):
+    """
+    Raised when a render does not finish within the pool's timeout.
+    """
+
+
+class RenderPool:
+    """
+    Bounded process pool for Graphviz renders, so request threads never run dot themselves.
+
+    At most max_pending distinct renders are queued or running at once; past that,
+    render raises RenderPoolFull. A request for a render that is already in flight
+    waits on the same future instead of starting another one. Each Graphviz process
+    is killed after timeout seconds, and callers stop waiting after the same time.
+
+    The executor is started on first use, so forking servers start one per worker
+    process rather than sharing one across a fork.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=30.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.timeout = timeout
+        self.rendered = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def depth(self):
+        """
+        Number of distinct renders queued or running.
+        """
+        return len(self._inflight)
+
+    def _start(self):
+        # Spawned workers do not inherit the server's threads and locks
+        return ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=warm_up
+        )
+
+    def _submit(self, key, completed_courses, format, focus=None, version=None):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            if len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                raise RenderPoolFull(f"{len(self._inflight)} renders already pending")
+            if self._executor is None:
+                self._executor = self._start()
+            future = self._executor.submit(
+                render_graphv2, list(completed_courses), format, self.timeout, focus=focus, version=version
+            )
+            self._inflight[key] = future
+            self.rendered += 1
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def render(self, key, completed_courses, format="png", focus=None, version=None):
+        """
+        Render the graph for a completed set, optionally limited to a FocusView, in
+        the pool and return the image bytes. Identical in-flight renders share one
+        key and one result. With a version, the worker renders that catalog version
+        or raises CatalogVersionError, so the key the caller built from it stays true.
+        """
+        future = self._submit(key, completed_courses, format, focus, version)
+        try:
+            return future.result(timeout=self.timeout)
+        except (FutureTimeout, subprocess.TimeoutExpired):
+            with self._lock:
+                self.timed_out += 1
+            raise RenderTimeout(f"render did not finish within {self.timeout:g}s")
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next request
+            with self._lock:
+                executor, self._executor = self._executor, None
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+SCRAPE_CACHE_FILE = "scrape_cache.sqlite3"
+
+
+def content_hash(body):
+    """
+    Hash a page body so unchanged pages can be recognized without re-parsing.
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()
+
+
+class ScrapeCache:
+    """
+    Persistent per-URL cache of HTTP validators, content hashes and parsed results.
+
+    Each record keeps the ETag and Last-Modified headers for conditional GETs,
+    the hash of the last body and the parsed (name, prerequisites). Only records
+    whose content actually changed are rewritten.
+    """
+
+    def __init__(self, path=SCRAPE_CACHE_FILE):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                name TEXT,
+                prerequisites TEXT,
+                checked_at REAL,
+                changed_at REAL
+            )
+            """
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, url):
+        """
+        Return the cached record for a URL as a dict, or None.
+        """
+        row = self._db.execute(
+            "SELECT etag, last_modified, content_hash, name, prerequisites FROM pages WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, body_hash, name, prerequisites = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": body_hash,
+            "name": name,
+            "prerequisites": json.loads(prerequisites),
+        }
+
+    def conditional_headers(self, url):
+        """
+        Return If-None-Match / If-Modified-Since headers for a cached URL.
+        """
+        record = self.get(url)
+        headers = {}
+        if record is not None:
+            if record["etag"]:
+                headers["If-None-Match"] = record["etag"]
+            if record["last_modified"]:
+                headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    def touch(self, url, etag=None, last_modified=None):
+        """
+        Record that a URL was checked and found unchanged, refreshing its validators.
+        """
+        self._db.execute(
+            """
+            UPDATE pages SET checked_at = ?,
+                etag = COALESCE(?, etag),
+                last_modified = COALESCE(?, last_modified)
+            WHERE url = ?
+            """,
+            (time.time(), etag, last_modified, url),
+        )
+
+    def store(self, url, etag, last_modified, body_hash, name, prerequisites):
+        """
+        Insert or replace the record for a URL whose content changed.
+        """
+        now = time.time()
+        self._db.execute(
+            """
+            INSERT OR REPLACE INTO pages
+                (url, etag, last_modified, content_hash, name, prerequisites, checked_at, changed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (url, etag, last_modified, body_hash, name,
+             json.dumps(prerequisites, ensure_ascii=False), now, now),
+        )
+
+    def commit(self):
+        self._db.commit()
@@ -0,0 +1,314 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from course_pages import DEFAULT_PARSER, SITE_URL, parse_course_links, parse_course_page
+from scrape_cache import content_hash
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """
+    Spaces requests to each host at least 1/rate seconds apart.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._locks = {}
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class PipelineMetrics:
+    """
+    Counters for the pipelined crawl: pages through each stage and parse queue depth.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.started = time.monotonic()
+        self.fetched = 0
+        self.parsed = 0
+        self.max_queue_depth = 0
+
+    def observe_queue(self):
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        depth = self.queue.qsize()
+        return (
+            f"fetch: {self.fetched} pages ({self.fetched / elapsed:.1f}/s), "
+            f"parse: {self.parsed} pages ({self.parsed / elapsed:.1f}/s), "
+            f"queue depth: {depth} (max {self.max_queue_depth})"
+        )
+
+    async def report_every(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(self.summary())
+
+
+class Scraper:
+    """
+    Async course page fetcher on one pooled keep-alive session, with bounded
+    concurrency, per-host rate limiting, timeouts and retries with backoff.
+
+    With a ScrapeCache, course pages are fetched with conditional GETs and only
+    pages whose content changed are parsed and written back. With parse_workers,
+    parsing moves to a process pool fed through a bounded queue.
+
+    Use as an async context manager:
+
+        async with Scraper() as scraper:
+            course_dependencies = await scraper.scrape_catalog(main_url)
+    """
+
+    def __init__(self, concurrency=16, per_host_rate=10.0, retries=3, backoff=0.5, timeout=15.0,
+                 site_url=SITE_URL, cache=None, parser=DEFAULT_PARSER, parse_workers=0,
+                 queue_size=64, report_interval=5.0):
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.site_url = site_url
+        self.cache = cache
+        self.parser = parser
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.metrics = None
+        self.rate_limiter = HostRateLimiter(per_host_rate)
+        self.stats = {"fetched": 0, "not_modified": 0, "unchanged": 0, "changed": 0, "failed": 0}
+        # Course pages that failed with no cached copy, whose results are placeholders
+        self.failed_urls = set()
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        self._session = aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+        if self.cache is not None:
+            self.cache.commit()
+
+    async def request(self, url, headers=None):
+        """
+        GET a URL with retries. Returns (status, body, response_headers),
+        or None if no usable response was received.
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            async with self._semaphore:
+                await self.rate_limiter.wait(host)
+                try:
+                    async with self._session.get(url, headers=headers) as response:
+                        if response.status not in RETRY_STATUSES:
+                            body = await response.read() if response.status == 200 else b""
+                            return response.status, body, response.headers
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt == self.retries:
+                        print(f"Giving up on {url}: {e!r}")
+                        return None
+            if attempt < self.retries:
+                # Exponential backoff with jitter, outside the concurrency slot
+                await asyncio.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        return None
+
+    async def fetch(self, url):
+        """
+        Fetch a page and return its text, or None if it could not be retrieved.
+        """
+        result = await self.request(url)
+        if result is None or result[0] != 200:
+            return None
+        return result[1].decode("utf-8", errors="replace")
+
+    async def fetch_course_links(self, main_url):
+        """
+        Fetch a program page and return {course_id: course_url}.
+        """
+        html = await self.fetch(main_url)
+        if html is None:
+            return {}
+        return parse_course_links(html, self.site_url)
+
+    async def fetch_course_page(self, course_url):
+        """
+        Fetch stage for one course page. Returns ("done", (course_name, prerequisites))
+        when no parsing is needed, or ("parse", page) with the raw body to parse.
+        With a cache, a conditional GET is sent and unchanged pages are not re-parsed.
+        """
+        cached = self.cache.get(course_url) if self.cache is not None else None
+        headers = self.cache.conditional_headers(course_url) if cached is not None else None
+
+        result = await self.request(course_url, headers)
+        if result is None or result[0] not in (200, 304):
+            self.stats["failed"] += 1
+            if cached is not None:
+                return "done", (cached["name"], cached["prerequisites"])
+            self.failed_urls.add(course_url)
+            return "done", ("Unknown Course", [])
+
+        status, body, response_headers = result
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        if status == 304 and cached is not None:
+            self.stats["not_modified"] += 1
+            self.cache.touch(course_url, etag, last_modified)
+            return "done", (cached["name"], cached["prerequisites"])
+
+        self.stats["fetched"] += 1
+        body_hash = content_hash(body)
+        if cached is not None and cached["content_hash"] == body_hash:
+            self.stats["unchanged"] += 1
+            self.cache.touch(course_url, etag, last_modified)
+            return "done", (cached["name"], cached["prerequisites"])
+
+        return "parse", (course_url, body, etag, last_modified, body_hash)
+
+    def finish_course_page(self, page, parsed):
+        """
+        Record a freshly parsed page in the cache and return the parse result.
+        """
+        course_url, _, etag, last_modified, body_hash = page
+        self.stats["changed"] += 1
+        if self.cache is not None:
+            self.cache.store(course_url, etag, last_modified, body_hash, *parsed)
+        return parsed
+
+    async def fetch_course(self, course_url):
+        """
+        Fetch a course page and return (course_name, prerequisites), parsing inline.
+        """
+        kind, value = await self.fetch_course_page(course_url)
+        if kind == "done":
+            return value
+        return self.finish_course_page(value, parse_course_page(value[1], self.parser))
+
+    async def scrape_courses(self, course_links):
+        """
+        Fetch all given course pages concurrently.
+        Returns {course_id: {"name": ..., "prerequisites": [...]}} in the input order.
+        With parse_workers set, parsing runs in a separate process pool stage.
+        """
+        course_ids = list(course_links)
+        if self.parse_workers:
+            results = await self._scrape_pipelined(course_links)
+        else:
+            results = await asyncio.gather(
+                *(self.fetch_course(course_links[course_id]) for course_id in course_ids),
+                return_exceptions=True,
+            )
+            results = dict(zip(course_ids, results))
+
+        course_dependencies = {}
+        for course_id in course_ids:
+            result = results[course_id]
+            if isinstance(result, Exception):
+                print(f"Error processing course {course_id}: {result}")
+                continue
+            course_name, prerequisites = result
+            course_dependencies[course_id] = {
+                "name": course_name,
+                "prerequisites": prerequisites
+            }
+        return course_dependencies
+
+    async def _scrape_pipelined(self, course_links):
+        """
+        Fetch stage streams raw pages into a bounded queue; parse workers drain it
+        into a process pool, so fetch concurrency and parse parallelism are independent.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        metrics = self.metrics = PipelineMetrics(queue)
+        results = {}
+
+        async def fetch_one(course_id, course_url):
+            try:
+                kind, value = await self.fetch_course_page(course_url)
+            except Exception as e:
+                results[course_id] = e
+                return
+            metrics.fetched += 1
+            if kind == "done":
+                results[course_id] = value
+            else:
+                await queue.put((course_id, value))
+                metrics.observe_queue()
+
+        async def parse_worker(pool):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                course_id, page = item
+                try:
+                    parsed = await loop.run_in_executor(pool, parse_course_page, page[1], self.parser)
+                    results[course_id] = self.finish_course_page(page, parsed)
+                except Exception as e:
+                    results[course_id] = e
+                metrics.parsed += 1
+
+        reporter = asyncio.create_task(metrics.report_every(self.report_interval))
+        with ProcessPoolExecutor(self.parse_workers) as pool:
+            workers = [asyncio.create_task(parse_worker(pool)) for _ in range(self.parse_workers)]
+            await asyncio.gather(
+                *(fetch_one(course_id, url) for course_id, url in course_links.items())
+            )
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        reporter.cancel()
+        print(metrics.summary())
+        return results
+
+    async def scrape_catalog(self, main_url):
+        """
+        Fetch a program page and every course page it links to.
+        """
+        course_links = await self.fetch_course_links(main_url)
+        return await self.scrape_courses(course_links)
+
+
+def scrape_catalog(main_url, **scraper_options):
+    """
+    Synchronous entry point: scrape a whole program page with a Scraper.
+    """
+    async def run():
+        async with Scraper(**scraper_options) as scraper:
+            return await scraper.scrape_catalog(main_url)
+    return asyncio.run(run())
+
+
+def scrape_courses(course_links, **scraper_options):
+    """
+    Synchronous entry point: scrape the given {course_id: course_url} pages with a Scraper.
+    """
+    async def run():
+        async with Scraper(**scraper_options) as scraper:
+            return await scraper.scrape_courses(course_links)
+    return asyncio.run(run())
@@ -0,0 +1,91 @@
+import glob
+import hashlib
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+PAGES = {}
+for path in sorted(glob.glob(os.path.join(FIXTURES, "course_pages", "*.html"))):
+    with open(path, "rb") as f:
+        PAGES[f"/courses/{os.path.basename(path)[:-5]}.htm"] = f.read()
+
+PROGRAM_PAGE = "".join(
+    f'<a href="{path}">{path}</a>\n' for path in PAGES
+).encode("utf-8")
+
+
+class StubSite(ThreadingHTTPServer):
+    """
+    Serves the fixture course pages with ETags, a program page linking to them,
+    and a configurable number of 503s before each page succeeds.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.failures = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def count(self, path, status):
+        return sum(1 for request in self.requests if request[0] == path and request[1] == status)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        site = self.server
+        with site.lock:
+            remaining = site.failures.get(self.path, 0)
+            if remaining:
+                site.failures[self.path] = remaining - 1
+        if remaining:
+            self.reply(503)
+            return
+        body = PROGRAM_PAGE if self.path == "/program.htm" else PAGES.get(self.path)
+        if body is None:
+            self.reply(404)
+            return
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.reply(304, etag=etag)
+            return
+        self.reply(200, body, etag)
+
+    def reply(self, status, body=b"", etag=None):
+        with self.server.lock:
+            self.server.requests.append((self.path, status, self.headers.get("If-None-Match")))
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = StubSite()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
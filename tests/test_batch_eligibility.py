@@ -0,0 +1,52 @@
+from batch_eligibility import evaluate_students, read_students_csv
+from graph_core import CourseGraph
+from overlap_index import OverlapIndex
+
+COURSES = {
+    "A": {"name": "A", "prerequisites": []},
+    "B": {"name": "B", "prerequisites": ["A"]},
+    "C": {"name": "C", "prerequisites": ["A", "B"]},
+    "D": {"name": "D", "prerequisites": ["X"]},
+    "E": {"name": "E", "prerequisites": ["B", "C", "D"]},
+}
+GRAPH = CourseGraph(COURSES, OverlapIndex([["X", "A"]]))
+
+
+def evaluate(*completed_sets, chunk_size=4096, unmet=True):
+    students = [(f"s{i}", list(completed)) for i, completed in enumerate(completed_sets)]
+    return list(evaluate_students(GRAPH, students, chunk_size, unmet))
+
+
+def test_unmet_prerequisites_of_unavailable_courses():
+    result, = evaluate([])
+    assert result["next"] == ["A"]
+    assert result["unmet"] == {"B": ["A"], "C": ["A", "B"], "D": ["X"], "E": ["B", "C", "D"]}
+    assert result["missing_one"] == {"B": "A", "D": "X"}
+
+
+def test_overlap_satisfies_prerequisites():
+    # Completing A also counts as the overlapping X
+    result, = evaluate(["A"])
+    assert result["next"] == ["B", "D"]
+    assert result["unmet"] == {"C": ["B"], "E": ["B", "C", "D"]}
+    assert result["missing_one"] == {"C": "B"}
+
+
+def test_unmet_map_is_opt_in():
+    sets = [[], ["A"], ["A", "B"], ["A", "B", "C", "X"]]
+    results = evaluate(*sets, unmet=False)
+    assert all("unmet" not in result for result in results)
+    assert results == [
+        {key: value for key, value in result.items() if key != "unmet"} for result in evaluate(*sets)
+    ]
+
+
+def test_chunks_give_the_same_results():
+    sets = [[], ["A"], ["A", "B"], ["A", "B", "C", "X"], ["Q"]]
+    assert evaluate(*sets, chunk_size=2) == evaluate(*sets)
+    assert evaluate(["Q"])[0]["unknown"] == ["Q"]
+
+
+def test_read_students_csv():
+    rows = ["student,courses", "s1,A;B", "s2,A B,C", ""]
+    assert list(read_students_csv(rows)) == [("s1", ["A", "B"]), ("s2", ["A", "B", "C"])]
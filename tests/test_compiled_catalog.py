@@ -0,0 +1,86 @@
+import os
+import random
+
+import pytest
+
+from compiled_catalog import CompiledCatalog, CompiledCatalogError, compile_catalog, verify_round_trip
+from conftest import ROOT
+from course_catalog import COURSE_FILE, OVERLAP_FILE, load_catalog
+from course_labels import CourseLabels
+
+COURSES = os.path.join(ROOT, COURSE_FILE)
+OVERLAPS = os.path.join(ROOT, OVERLAP_FILE)
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load_catalog(COURSES, OVERLAPS)
+
+
+@pytest.fixture
+def compiled_file(catalog, tmp_path):
+    path = str(tmp_path / "catalog.bin")
+    compile_catalog(catalog, path)
+    return path
+
+
+def completed_sets(catalog):
+    ids = list(catalog.courses)
+    rnd = random.Random(0)
+    sets = [[], ids, ids[:1], ["20441", "20109", "20476"]]
+    sets.extend(rnd.sample(ids, rnd.randint(1, len(ids) // 2)) for _ in range(20))
+    return sets
+
+
+def test_round_trip(catalog, compiled_file):
+    with CompiledCatalog(compiled_file) as compiled:
+        assert verify_round_trip(catalog, compiled) == []
+
+
+def test_compiled_graph_matches_json_graph(catalog, compiled_file):
+    compiled_catalog = load_catalog(COURSES, OVERLAPS, compiled_file)
+    assert compiled_catalog.version == catalog.version
+    assert compiled_catalog.courses_json == catalog.courses_json
+    # Loaded from the mapped file, not rebuilt from the JSON
+    assert isinstance(compiled_catalog.graph.prereq_targets, memoryview)
+    for completed in completed_sets(catalog):
+        assert compiled_catalog.graph.next_courses(completed) == catalog.graph.next_courses(completed)
+        mask = catalog.graph.mask_of(completed)
+        assert compiled_catalog.graph.node_statuses(mask) == catalog.graph.node_statuses(mask)
+
+
+def test_compiled_catalog_matches_json_catalog(catalog, compiled_file):
+    compiled_catalog = load_catalog(COURSES, OVERLAPS, compiled_file)
+    assert list(compiled_catalog.courses) == list(catalog.courses)
+    assert dict(compiled_catalog.courses.items()) == dict(catalog.courses.items())
+    assert "no such course" not in compiled_catalog.courses
+    overlap_index = compiled_catalog.overlap_index
+    assert overlap_index.groups == catalog.overlap_index.groups
+    assert overlap_index.classes == catalog.overlap_index.classes
+    assert overlap_index.class_of == catalog.overlap_index.class_of
+    assert overlap_index.course_mask == catalog.overlap_index.course_mask
+    assert compiled_catalog.labels.lines == catalog.labels.lines
+    assert compiled_catalog.labels.html == catalog.labels.html
+
+
+def test_labels_of_another_width_are_rewrapped(catalog, compiled_file):
+    with CompiledCatalog(compiled_file) as compiled:
+        labels = compiled.labels(max_width=8)
+        assert labels.lines == CourseLabels(catalog.graph.names, 8).lines
+
+
+def test_stale_compiled_file_is_ignored(catalog, compiled_file, tmp_path):
+    overlaps = tmp_path / "overlaps.json"
+    overlaps.write_text("[]", encoding="utf-8")
+    loaded = load_catalog(COURSES, str(overlaps), compiled_file)
+    assert loaded.version != catalog.version
+    assert loaded.overlapping_groups == ()
+
+
+def test_truncated_file_is_rejected(compiled_file):
+    with open(compiled_file, "rb") as f:
+        data = f.read()
+    with open(compiled_file, "wb") as f:
+        f.write(data[:len(data) // 2])
+    with pytest.raises(CompiledCatalogError):
+        CompiledCatalog(compiled_file)
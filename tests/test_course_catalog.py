@@ -0,0 +1,34 @@
+import json
+import os
+import time
+
+from course_catalog import catalog_version, load_catalog, save_json
+
+
+def snapshots(tmp_path):
+    return sorted(os.listdir(tmp_path / "catalog_snapshots"))
+
+
+def test_save_json_keeps_current_snapshot_when_pruning(tmp_path):
+    path = str(tmp_path / "courses.json")
+    for version in range(3):
+        save_json(path, {"version": version}, keep=3)
+    # Age the snapshots so that version 0 is the oldest
+    for name in snapshots(tmp_path):
+        snapshot = tmp_path / "catalog_snapshots" / name
+        written = time.time() - 60 + json.loads(snapshot.read_text())["version"]
+        os.utime(snapshot, (written, written))
+
+    # Going back to version 0 reuses its snapshot, which must not be pruned as the oldest
+    save_json(path, {"version": 0}, keep=3)
+    save_json(path, {"version": 3}, keep=2)
+    kept = [json.loads((tmp_path / "catalog_snapshots" / name).read_text()) for name in snapshots(tmp_path)]
+    assert sorted(data["version"] for data in kept) == [0, 3]
+
+
+def test_catalog_version_is_the_loaded_version(tmp_path):
+    course_file = str(tmp_path / "courses.json")
+    overlap_file = str(tmp_path / "overlaps.json")
+    save_json(course_file, {"A": {"name": "A", "prerequisites": []}}, snapshot_dir=None)
+    save_json(overlap_file, [], snapshot_dir=None)
+    assert catalog_version(course_file, overlap_file) == load_catalog(course_file, overlap_file).version
@@ -0,0 +1,52 @@
+import glob
+import os
+
+import pytest
+
+from conftest import FIXTURES
+from course_pages import (
+    PARSER_BACKENDS, compare_parsers, parse_course_page, parse_prerequisites_and_name,
+    parse_prerequisites_and_name_bs4, parse_prerequisites_and_name_targeted,
+)
+
+PAGE_FILES = sorted(glob.glob(os.path.join(FIXTURES, "course_pages", "*.html")))
+BACKENDS = [name for name in PARSER_BACKENDS if name != "bs4"]
+
+
+def read_page(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_fixtures_present():
+    assert PAGE_FILES
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("path", PAGE_FILES, ids=os.path.basename)
+def test_backend_matches_bs4(path, backend):
+    html = read_page(path)
+    assert parse_prerequisites_and_name(html, backend) == parse_prerequisites_and_name_bs4(html)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+@pytest.mark.parametrize("path", PAGE_FILES, ids=os.path.basename)
+def test_targeted_across_chunk_boundaries(path, chunk_size):
+    html = read_page(path)
+    assert parse_prerequisites_and_name_targeted(html, chunk_size) == parse_prerequisites_and_name_bs4(html)
+
+
+def test_reference_results():
+    html = read_page(os.path.join(FIXTURES, "course_pages", "20441.html"))
+    assert parse_prerequisites_and_name_bs4(html) == ("20441 מבוא למדעי המחשב ושפת Java", ["20109", "20476"])
+    html = read_page(os.path.join(FIXTURES, "course_pages", "20109.html"))
+    assert parse_prerequisites_and_name_bs4(html) == ("20109 מתמטיקה בדידה", [])
+
+
+def test_parse_course_page_decodes_bytes():
+    html = read_page(os.path.join(FIXTURES, "course_pages", "20582.html"))
+    assert parse_course_page(html.encode("utf-8")) == ("20582 תורת הקומפילציה", ["20407", "20465"])
+
+
+def test_compare_parsers_reports_no_mismatches():
+    assert compare_parsers([(path, read_page(path)) for path in PAGE_FILES]) == {}
@@ -0,0 +1,76 @@
+from graph_core import CourseGraph, prefix_sets
+from overlap_index import OverlapIndex
+
+COURSES = {
+    "A": {"name": "A", "prerequisites": []},
+    "A2": {"name": "A, newer syllabus", "prerequisites": []},
+    "B": {"name": "B", "prerequisites": ["A"]},
+    "C": {"name": "C", "prerequisites": []},
+    "D": {"name": "D", "prerequisites": ["D"]},
+}
+
+
+def as_sets(course_sets):
+    return {frozenset(courses) for courses in course_sets}
+
+
+def test_prefix_sets_without_overlaps():
+    sets = list(prefix_sets(CourseGraph(COURSES), 2))
+    assert len(sets) == len(as_sets(sets))
+    assert as_sets(sets) == as_sets(
+        [[], ["A"], ["A2"], ["C"], ["A", "A2"], ["A", "B"], ["A", "C"], ["A2", "C"]]
+    )
+
+
+def test_prefix_sets_skip_prerequisite_cycles():
+    assert not any("D" in courses for courses in prefix_sets(CourseGraph(COURSES), 4))
+
+
+def test_prefix_sets_keep_one_set_per_overlap_class():
+    graph = CourseGraph(COURSES, OverlapIndex([["A", "A2"]]))
+    sets = list(prefix_sets(graph, 3))
+    assert as_sets(sets) == as_sets(
+        [[], ["A"], ["C"], ["A", "B"], ["A", "C"], ["A", "B", "C"]]
+    )
+
+
+def test_prefix_sets_reach_through_overlapping_courses():
+    # E is only reachable by satisfying A through A2, which sorts after it
+    courses = {
+        "A": {"name": "A", "prerequisites": ["Z"]},
+        "A2": {"name": "A2", "prerequisites": []},
+        "E": {"name": "E", "prerequisites": ["A"]},
+        "Z": {"name": "Z", "prerequisites": ["Z"]},
+    }
+    graph = CourseGraph(courses, OverlapIndex([["A", "A2"]]))
+    assert as_sets(prefix_sets(graph, 2)) == as_sets([[], ["A2"], ["A2", "E"]])
+
+
+def test_prefix_sets_keep_courses_of_intransitive_overlaps():
+    # X overlaps Y and Y overlaps Z, but X and Z are different courses
+    courses = {course: {"name": course, "prerequisites": []} for course in "XYZ"}
+    graph = CourseGraph(courses, OverlapIndex([["X", "Y"], ["Y", "Z"]], transitive=False))
+    sets = as_sets(prefix_sets(graph, 1))
+    assert frozenset(["Z"]) in sets and frozenset(["X"]) in sets
+
+
+def test_prefix_sets_match_brute_force():
+    graph = CourseGraph(COURSES, OverlapIndex([["A", "A2"]]))
+    reachable = {0: 0}
+    frontier = {0}
+    for _ in range(3):
+        grown = set()
+        for mask in frontier:
+            satisfied = graph.satisfied_mask(mask)
+            for node in range(len(graph.ids)):
+                if graph.next_mask(mask, satisfied) >> node & 1 and not satisfied >> node & 1:
+                    grown.add(mask | 1 << node)
+        frontier = grown
+        for mask in grown:
+            reachable.setdefault(graph.satisfied_mask(mask), mask)
+    found = {graph.satisfied_mask(graph.mask_of(courses)) for courses in prefix_sets(graph, 3)}
+    assert found == set(reachable)
+
+
+def test_prefix_sets_limit():
+    assert len(list(prefix_sets(CourseGraph(COURSES), 3, limit=4))) == 4
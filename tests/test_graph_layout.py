@@ -0,0 +1,79 @@
+import os
+import stat
+import subprocess
+
+import pytest
+
+from graph_layout import layout_graph, stream_with_layout
+
+
+class DotSource:
+    def __init__(self, size):
+        self.size = size
+
+    def string(self):
+        return "x" * self.size
+
+    def from_string(self, data):
+        self.laid_out = data
+
+
+@pytest.fixture
+def fake_neato(tmp_path, monkeypatch):
+    """
+    Put a neato on PATH that writes output_size bytes and exits with status.
+    """
+    def install(output_size, status=0):
+        script = tmp_path / "neato"
+        # exec so that a neato killed by SIGPIPE reports it, as the real one would
+        command = f"head -c {output_size} /dev/zero"
+        body = f"exec {command}" if status == 0 else f"{command}\nexit {status}"
+        script.write_text(f"#!/bin/sh\n{body}\n")
+        script.chmod(script.stat().st_mode | stat.S_IXUSR)
+        monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    return install
+
+
+@pytest.fixture
+def fake_dot(tmp_path, monkeypatch):
+    """
+    Put a dot on PATH that runs the given shell body.
+    """
+    def install(body):
+        script = tmp_path / "dot"
+        script.write_text(f"#!/bin/sh\n{body}\n")
+        script.chmod(script.stat().st_mode | stat.S_IXUSR)
+        monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    return install
+
+
+def test_layout_reads_positions_back(fake_dot):
+    fake_dot("exec cat")
+    graph = DotSource(5)
+    layout_graph(graph, timeout=5)
+    assert graph.laid_out == "xxxxx" and graph.has_layout
+
+
+def test_layout_is_killed_after_timeout(fake_dot):
+    fake_dot("exec sleep 10")
+    with pytest.raises(subprocess.TimeoutExpired):
+        layout_graph(DotSource(5), timeout=0.2)
+
+
+def test_streams_whole_output(fake_neato):
+    fake_neato(200000)
+    assert sum(len(chunk) for chunk in stream_with_layout(DotSource(100), chunk_size=4096)) == 200000
+
+
+def test_failed_layout_raises(fake_neato):
+    fake_neato(10, status=2)
+    with pytest.raises(RuntimeError, match="status 2"):
+        list(stream_with_layout(DotSource(100)))
+
+
+def test_client_disconnect_stops_quietly(fake_neato):
+    fake_neato(10_000_000)
+    chunks = stream_with_layout(DotSource(1_000_000), chunk_size=1024)
+    next(chunks)
+    # Closing raises GeneratorExit inside the generator; neato is killed, nothing is raised
+    chunks.close()
@@ -0,0 +1,114 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from conftest import ROOT
+from graph_core import CourseGraph
+from overlap_index import OverlapIndex
+
+NODE = shutil.which("node")
+pytestmark = pytest.mark.skipif(NODE is None, reason="needs Node.js to run the page's script")
+
+# Feeds the page's incremental eligibility code a layout and a sequence of toggles,
+# and prints every status after each toggle along with what it asked to repaint
+RUNNER = """
+const { layout, steps } = JSON.parse(require('fs').readFileSync(0, 'utf-8'));
+layout.prerequisites = layout.nodes.map(() => []);
+for (const [source, target] of layout.edges) {
+    layout.prerequisites[target].push(source);
+}
+%s
+resetState();
+const snapshot = () => ({
+    nodes: layout.nodes.map((node, i) => nodeStatus(i)),
+    edges: layout.edges.map((edge, i) => edgeStatus(i)),
+});
+const results = [snapshot()];
+for (const [i, done] of steps) {
+    const changed = setCompleted(i, done);
+    results.push({ ...snapshot(), repaint: { nodes: [...changed.nodes], edges: [...changed.edges] } });
+}
+console.log(JSON.stringify(results));
+"""
+
+
+def eligibility_script():
+    """
+    Cut the incremental eligibility code, from its state to setCompleted, out of
+    the page.
+    """
+    with open(os.path.join(ROOT, "static", "index.html"), encoding="utf-8") as f:
+        page = f.read()
+    start = page.index("let state = null;")
+    end = page.index("function paintNode")
+    return page[start:end]
+
+
+def random_catalog(rnd, transitive):
+    ids = [f"C{i}" for i in range(30)]
+    courses = {}
+    for position, course_id in enumerate(ids):
+        prereqs = rnd.sample(ids[:position], min(position, rnd.randint(0, 3)))
+        if rnd.random() < 0.2:
+            prereqs.append(f"X{rnd.randint(0, 3)}")
+        courses[course_id] = {"name": course_id, "prerequisites": prereqs}
+    groups = [rnd.sample(ids, rnd.randint(2, 3)) for _ in range(6)]
+    return CourseGraph(courses, OverlapIndex(groups, transitive))
+
+
+def layout_of(graph):
+    """
+    The parts of layout_payload that the page's eligibility code reads.
+    """
+    return {
+        "nodes": [
+            {"id": course_id, "course": node < graph.course_count} for node, course_id in enumerate(graph.ids)
+        ],
+        "edges": [
+            [prereq, node] for node in range(graph.course_count) for prereq in graph.prerequisites(node)
+        ],
+        "overlap": [
+            [graph.index[course] for course in members]
+            for members in graph.overlap_index.bit_members if len(members) > 1
+        ],
+    }
+
+
+@pytest.mark.parametrize("transitive", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_statuses_match_course_graph(seed, transitive):
+    rnd = random.Random(seed)
+    graph = random_catalog(rnd, transitive)
+    layout = layout_of(graph)
+    steps = [[rnd.randrange(graph.course_count), rnd.random() < 0.6] for _ in range(60)]
+    script = RUNNER % eligibility_script()
+    run = subprocess.run(
+        [NODE, "-e", script], input=json.dumps({"layout": layout, "steps": steps}),
+        capture_output=True, text=True, check=True,
+    )
+    results = json.loads(run.stdout)
+
+    completed = set()
+    previous = None
+    for step, result in zip([None, *steps], results):
+        if step is not None:
+            node, done = step
+            (completed.add if done else completed.discard)(graph.ids[node])
+        completed_mask = graph.mask_of(completed)
+        satisfied = graph.satisfied_mask(completed_mask)
+        expected = {
+            "nodes": graph.node_statuses(completed_mask, satisfied),
+            "edges": [graph.edge_status(prereq, completed_mask, satisfied) for prereq, _ in layout["edges"]],
+        }
+        assert result["nodes"] == expected["nodes"], (seed, step)
+        assert result["edges"] == expected["edges"], (seed, step)
+        if previous is not None:
+            # Everything whose status changed was handed back for repainting
+            for kind in ("nodes", "edges"):
+                changed = {i for i, status in enumerate(result[kind]) if status != previous[kind][i]}
+                assert changed <= set(result["repaint"][kind]), (seed, step, kind)
+        previous = result
@@ -0,0 +1,82 @@
+import asyncio
+import importlib.util
+import json
+import os
+
+from conftest import ROOT
+
+spec = importlib.util.spec_from_file_location("load_additional", os.path.join(ROOT, "load-additional.py"))
+load_additional = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(load_additional)
+
+COMPILERS = {"name": "20582 תורת הקומפילציה", "prerequisites": ["20407", "20465"]}
+
+
+def crawl(site, course_data, checkpoint, **options):
+    site.requests.clear()
+    return asyncio.run(load_additional.crawl_missing_courses(
+        course_data, f"{site.url}/courses/", checkpoint_file=checkpoint,
+        site_url=site.url, per_host_rate=0, backoff=0.01, retries=0, **options,
+    ))
+
+
+def fetched_paths(site):
+    return {request[0] for request in site.requests}
+
+
+def test_crawls_to_a_fixed_point(site, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    course_data = crawl(site, {"20582": COMPILERS}, checkpoint)
+    assert set(course_data) == {"20582", "20407", "20465", "20441", "20109"}
+    assert course_data["20407"]["prerequisites"] == ["20441", "20109", "20476"]
+    # 20476 has no page on the stub site, so it is left out and kept for a retry
+    assert "20476" not in course_data
+    with open(checkpoint, encoding="utf-8") as f:
+        state = json.load(f)
+    assert state["failed"] == [["20476", 2]] and state["frontier"] == []
+
+
+def test_resume_keeps_json_edits(site, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    crawl(site, {"20582": COMPILERS}, checkpoint, max_courses=1)
+    with open(checkpoint, encoding="utf-8") as f:
+        assert list(json.load(f)["fetched"]) == ["20407"]
+
+    # The JSON is edited between runs: 20465 added by hand, with a new prerequisite
+    edited = {"name": "edited by hand", "prerequisites": ["20604"]}
+    course_data = crawl(site, {"20582": COMPILERS, "20465": edited}, checkpoint)
+
+    assert course_data["20465"] == edited
+    assert course_data["20407"]["prerequisites"] == ["20441", "20109", "20476"]
+    paths = fetched_paths(site)
+    assert "/courses/20604.htm" in paths
+    assert "/courses/20465.htm" not in paths
+    assert "/courses/20407.htm" not in paths
+
+
+def test_resume_retries_failed_fetches(site, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    site.failures["/courses/20109.htm"] = 1
+    course_data = crawl(site, {"20582": COMPILERS}, checkpoint)
+    assert "20109" not in course_data
+
+    course_data = crawl(site, {"20582": COMPILERS}, checkpoint)
+    assert course_data["20109"]["prerequisites"] == []
+    assert fetched_paths(site) == {"/courses/20109.htm", "/courses/20476.htm"}
+    # 20476 still has no page, so the checkpoint is kept for another retry
+    with open(checkpoint, encoding="utf-8") as f:
+        assert json.load(f)["failed"] == [["20476", 2]]
+
+
+def test_resumes_old_checkpoint_format(site, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    stale = {"name": "stale copy", "prerequisites": []}
+    checkpoint.write_text(json.dumps({
+        "course_data": {"20582": stale, "20407": {"name": "from checkpoint", "prerequisites": []}},
+        "frontier": [["20465", 1]],
+        "visited": ["20582", "20407", "20465"],
+    }), encoding="utf-8")
+    course_data = crawl(site, {"20582": COMPILERS}, str(checkpoint))
+    assert course_data["20582"] == COMPILERS
+    assert course_data["20407"]["name"] == "from checkpoint"
+    assert fetched_paths(site) == {"/courses/20465.htm"}
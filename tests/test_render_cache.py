@@ -0,0 +1,82 @@
+import os
+import time
+
+from render_cache import RenderCache, cache_key, render_variant
+
+
+def key(n):
+    return cache_key([str(n)], render_variant("svg"), "v1")
+
+
+def age(cache, k, seconds):
+    path = cache._disk_path(k)
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_memory_then_disk(tmp_path):
+    cache = RenderCache(max_entries=1, disk_dir=str(tmp_path))
+    cache.put(key(1), b"one")
+    cache.put(key(2), b"two")
+    assert cache.lookup(key(2)) == (b"two", None)
+    # Evicted from memory, still on disk
+    data, disk_file = cache.lookup(key(1))
+    with disk_file:
+        assert data is None and disk_file.read() == b"one"
+    assert cache.get(key(1)) == b"one"
+    assert cache.get(key(3)) is None
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_disk_files_are_world_readable(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path))
+    cache.write_disk(key(1), b"data")
+    assert os.stat(cache._disk_path(key(1))).st_mode & 0o044
+
+
+def test_prune_by_size_keeps_recently_used(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path))
+    for n in range(3):
+        cache.write_disk(key(n), b"x" * 10)
+        age(cache, key(n), 100 - n)
+    cache.max_disk_bytes = 25
+    # A disk hit makes the oldest file the most recently used
+    cache.lookup(key(0))[1].close()
+    assert cache.prune_disk() == 1
+    assert [cache.on_disk(key(n)) for n in range(3)] == [True, False, True]
+
+
+def test_disk_hit_survives_pruning(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path), max_disk_age=3600)
+    cache.write_disk(key(1), b"data")
+    _, disk_file = cache.lookup(key(1))
+    age(cache, key(1), 7200)
+    assert cache.prune_disk() == 1
+    with disk_file:
+        assert disk_file.read() == b"data"
+
+
+def test_prune_by_age(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path), max_disk_age=3600)
+    cache.write_disk(key(1), b"old")
+    cache.write_disk(key(2), b"new")
+    age(cache, key(1), 7200)
+    assert cache.prune_disk() == 1
+    assert not cache.on_disk(key(1))
+    assert cache.on_disk(key(2))
+
+
+def test_writes_trigger_pruning(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path), max_disk_bytes=100)
+    for n in range(50):
+        cache.write_disk(key(n), b"x" * 10)
+    assert sum(cache.on_disk(key(n)) for n in range(50)) <= 10
+    assert cache.on_disk(key(49))
+
+
+def test_unbounded_by_default(tmp_path):
+    cache = RenderCache(disk_dir=str(tmp_path))
+    for n in range(5):
+        cache.write_disk(key(n), b"x" * 10)
+    assert cache.prune_disk() == 0
+    assert all(cache.on_disk(key(n)) for n in range(5))
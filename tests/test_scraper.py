@@ -0,0 +1,81 @@
+import asyncio
+
+from conftest import PAGES
+from course_pages import parse_prerequisites_and_name_bs4
+from scrape_cache import ScrapeCache
+from scraper import Scraper
+
+def expected_catalog():
+    return {
+        path[len("/courses/"):-len(".htm")]: dict(zip(
+            ("name", "prerequisites"), parse_prerequisites_and_name_bs4(body.decode("utf-8"))
+        ))
+        for path, body in PAGES.items()
+    }
+
+
+def scrape(site, **options):
+    """
+    Scrape the stub site's program page; returns (catalog, scraper stats, server requests).
+    """
+    options = {"site_url": site.url, "per_host_rate": 0, "backoff": 0.01, **options}
+
+    async def run():
+        async with Scraper(**options) as scraper:
+            catalog = await scraper.scrape_catalog(f"{site.url}/program.htm")
+            return catalog, scraper.stats
+
+    site.requests.clear()
+    return asyncio.run(run())
+
+
+def test_scrapes_every_linked_page(site):
+    catalog, stats = scrape(site)
+    assert catalog == expected_catalog()
+    assert stats["changed"] == len(PAGES)
+
+
+def test_retries_server_errors(site):
+    path = next(iter(PAGES))
+    site.failures[path] = 2
+    catalog, stats = scrape(site, retries=3)
+    assert catalog == expected_catalog()
+    assert site.count(path, 503) == 2
+    assert site.count(path, 200) == 1
+    assert stats["failed"] == 0
+
+
+def test_gives_up_after_retries(site):
+    path = next(iter(PAGES))
+    site.failures[path] = 10
+    catalog, stats = scrape(site, retries=2)
+    course_id = path[len("/courses/"):-len(".htm")]
+    assert catalog[course_id] == {"name": "Unknown Course", "prerequisites": []}
+    assert site.count(path, 503) == 3
+    assert stats["failed"] == 1
+
+
+def test_revalidates_through_cache(site, tmp_path):
+    with ScrapeCache(str(tmp_path / "cache.sqlite3")) as cache:
+        first, stats = scrape(site, cache=cache)
+        assert stats["changed"] == len(PAGES)
+
+        second, stats = scrape(site, cache=cache)
+        assert second == first == expected_catalog()
+        assert stats["not_modified"] == len(PAGES)
+        assert stats["changed"] == 0
+        for path in PAGES:
+            assert site.count(path, 304) == 1
+
+        # A failed request falls back to the cached result
+        path = next(iter(PAGES))
+        site.failures[path] = 10
+        third, stats = scrape(site, cache=cache, retries=0)
+        assert third == first
+        assert stats["failed"] == 1
+
+
+def test_parses_in_process_pool(site):
+    catalog, stats = scrape(site, parse_workers=2, report_interval=60)
+    assert catalog == expected_catalog()
+    assert stats["changed"] == len(PAGES)
@@ -1,6 +1,9 @@
 import json
 import pygraphviz as pgv
 
+from course_labels import wrap_text
+from graph_core import CourseGraph, as_course_graph
+
 def load_data(json_file):
     """
     Load course dependencies and details from a JSON file.
@@ -15,25 +18,6 @@ def save_data(json_file, data):
     with open(json_file, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
 
-def wrap_text(label, max_width=15):
-    """
-    Wrap text to fit within a node by breaking at spaces.
-    """
-    words = label.split()
-    lines = []
-    current_line = []
-
-    for word in words:
-        if sum(len(w) for w in current_line) + len(current_line) + len(word) > max_width:
-            lines.append(" ".join(current_line))
-            current_line = [word]
-        else:
-            current_line.append(word)
-
-    if current_line:
-        lines.append(" ".join(current_line))
-    return "<br/>".join(lines)
-
 def add_completed_courses_to_graph(graph, completed_courses):
     """
     Add completed courses to the graph and mark them as completed.
@@ -45,13 +29,9 @@ def add_completed_courses_to_graph(graph, completed_courses):
 def identify_next_courses(course_data, completed_courses):
     """
     Identify courses that can be taken next based on completed prerequisites.
+    course_data may be plain course data or a prebuilt CourseGraph.
     """
-    next_courses = []
-    for course_id, details in course_data.items():
-        prerequisites = details["prerequisites"]
-        if all(prereq in completed_courses for prereq in prerequisites) and course_id not in completed_courses:
-            next_courses.append(course_id)
-    return next_courses
+    return as_course_graph(course_data).next_courses(completed_courses)
 
 def generate_circular_graph(course_data, completed_courses, output_file="updated_course_dependencies.png"):
     """
@@ -59,6 +39,8 @@ def generate_circular_graph(course_data, completed_courses, output_file="updated
     and marking completed courses.
     """
     graph = pgv.AGraph(strict=True, directed=True, rankdir="TB")
+    course_graph = CourseGraph(course_data)
+    completed = set(completed_courses)
 
     colors = {
         "default": "#D3D3D3",
@@ -73,7 +55,7 @@ def generate_circular_graph(course_data, completed_courses, output_file="updated
         wrapped_label = wrap_text(raw_label, max_width=15)
         prerequisites = details["prerequisites"]
 
-        fillcolor = colors["completed"] if course_id in completed_courses else colors["default"]
+        fillcolor = colors["completed"] if course_id in completed else colors["default"]
         graph.add_node(
             course_id,
             label=f"<{wrapped_label}>",
@@ -92,7 +74,7 @@ def generate_circular_graph(course_data, completed_courses, output_file="updated
     add_completed_courses_to_graph(graph, completed_courses)
 
     # Identify and mark next courses
-    next_courses = identify_next_courses(course_data, completed_courses)
+    next_courses = identify_next_courses(course_graph, completed_courses)
     for course_id in next_courses:
         graph.get_node(course_id).attr.update(style="filled", fillcolor=colors["next"])
 
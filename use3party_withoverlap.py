@@ -1,6 +1,20 @@
 import json
+import time
+from dataclasses import dataclass
+
 import pygraphviz as pgv
 
+from course_catalog import get_catalog
+from course_labels import CourseLabels
+from graph_core import FOCUS_VIEWS, CourseGraph, Reachability, as_course_graph, flags_of
+from instrumentation import stage
+from graph_layout import (
+    LayoutCache, apply_layout, draw_with_layout, layout_bounds, layout_graph, render_with_layout,
+    stream_with_layout,
+    svg_edge_geometry, svg_node_geometry,
+)
+from overlap_index import as_overlap_index
+
 def load_data(json_file):
     """
     Load course dependencies and details from a JSON file.
@@ -8,37 +22,14 @@ def load_data(json_file):
     with open(json_file, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def wrap_text(label, max_width=15):
-    """
-    Wrap text to fit within a node by breaking at spaces.
-    """
-    words = label.split()
-    lines = []
-    current_line = []
-
-    for word in words:
-        if sum(len(w) for w in current_line) + len(current_line) + len(word) > max_width:
-            lines.append(" ".join(current_line))
-            current_line = [word]
-        else:
-            current_line.append(word)
-
-    if current_line:
-        lines.append(" ".join(current_line))
-    return "<br/>".join(lines)
-
 def incorporate_overlapping_courses(course_data, overlapping_groups, completed_courses):
     """
     Remove overlapping courses from consideration, ensuring only unmet prerequisites or completed courses are kept.
+    overlapping_groups may be the raw groups or a prebuilt OverlapIndex.
     """
-    # Convert overlapping groups into a dictionary for quick lookup
-    overlap_map = {}
-    for group in overlapping_groups:
-        for course in group:
-            if overlap_map.get(course):
-                overlap_map[course].update(group)
-            else:
-                overlap_map[course] = set(group)
+    overlap_index = as_overlap_index(overlapping_groups)
+    completed = set(completed_courses)
+    completed_mask = overlap_index.completed_mask(completed)
 
     filtered_course_data = {}
 
@@ -47,18 +38,12 @@ def incorporate_overlapping_courses(course_data, overlapping_groups, completed_c
 
         filtered_prereqs = set()
         for prereq in prerequisites:
-            if prereq in completed_courses:
+            if prereq in completed:
                 # If the prerequisite is completed, keep it
                 filtered_prereqs.add(prereq)
-            else:
-                # If not completed, check if it belongs to an overlapping group
-                if prereq in overlap_map:
-                    # If no overlapping course is completed, keep the prerequisite
-                    if not overlap_map[prereq].intersection(completed_courses):
-                        filtered_prereqs.add(prereq)
-                else:
-                    # If not part of an overlapping group, keep it
-                    filtered_prereqs.add(prereq)
+            elif not overlap_index.is_satisfied(prereq, completed_mask):
+                # Keep it unless an equivalent overlapping course is completed
+                filtered_prereqs.add(prereq)
 
         # Update the course with filtered prerequisites
         filtered_course_data[course_id] = {
@@ -72,48 +57,106 @@ def incorporate_overlapping_courses(course_data, overlapping_groups, completed_c
 def identify_next_courses(course_data, completed_courses):
     """
     Identify courses that can be taken next based on completed prerequisites.
+    course_data may be plain course data or a prebuilt CourseGraph.
     """
-    next_courses = []
-    for course_id, details in course_data.items():
-        prerequisites = details["prerequisites"]
-        if all(prereq in completed_courses for prereq in prerequisites) and course_id not in completed_courses:
-            next_courses.append(course_id)
-    return next_courses
+    return as_course_graph(course_data).next_courses(completed_courses)
 
-def generate_circular_graph(
-    course_data, completed_courses, overlapping_groups, output_file="updated_course_dependencies.png"
-    ,format="png"
-):
+COLORS = {
+    "default": "#D3D3D3",  # Grey for unavailable
+    "completed": "#90EE90",  # Light green
+    "next": "#FFD700",       # Gold
+    "unmet": "red",          # Red for unmet prerequisites
+    "prerequisite": "black",  # Black for normal prerequisites
+}
+
+# Layout of the full catalog, shared by all requests for the same data version
+layout_cache = LayoutCache()
+_payload_cache = {}
+_reachability_cache = {}
+
+
+@dataclass(frozen=True)
+class FocusView:
     """
-    Generate a course dependency graph with perfect circles, dynamic label wrapping,
-    marking completed courses, and highlighting unmet prerequisites for unavailable courses.
+    A part of the catalog to draw instead of all of it: one of FOCUS_VIEWS, the
+    courses it centers on, and an optional limit on prerequisite hops.
     """
-    # Incorporate overlapping courses into the data
-    filtered_course_data = incorporate_overlapping_courses(course_data, overlapping_groups, completed_courses)
+    view: str
+    courses: tuple = ()
+    hops: int = None
 
-    # Create graph
+    def __post_init__(self):
+        if self.view not in FOCUS_VIEWS:
+            raise ValueError(f"view must be one of {', '.join(FOCUS_VIEWS)}")
+        if self.view != "frontier" and not self.courses:
+            raise ValueError(f"the {self.view} view needs at least one focus course")
+        if self.hops is not None and self.hops < 0:
+            raise ValueError("hops must not be negative")
+
+    @property
+    def variant(self):
+        """
+        Canonical description of the view, for cache keys and ETags.
+        """
+        hops = "" if self.hops is None else self.hops
+        return f"{self.view}:{hops}:{','.join(sorted(set(self.courses)))}"
+
+
+def get_reachability(catalog):
+    """
+    Return the Reachability of the catalog's graph, built once per data version.
+    """
+    reachability = _reachability_cache.get(catalog.version)
+    if reachability is None:
+        reachability = Reachability(catalog.graph)
+        _reachability_cache.clear()
+        _reachability_cache[catalog.version] = reachability
+    return reachability
+
+def focus_mask(catalog, completed_courses, focus):
+    """
+    Return the node bitmask of the courses a FocusView draws.
+    """
+    course_graph = catalog.graph
+    return get_reachability(catalog).view_mask(
+        focus.view, course_graph.mask_of(focus.courses), course_graph.mask_of(completed_courses), focus.hops,
+    )
+
+def build_course_graph(course_graph, completed_courses, nodes=None, labels=None):
+    """
+    Build the styled graph: perfect circles, wrapped labels, completed and next courses
+    colored, and unmet prerequisite edges in red. Prerequisites covered by a completed
+    overlapping course are left out. With a nodes bitmask, only those courses and the
+    edges between them are drawn. labels are the catalog's precomputed CourseLabels.
+    """
     graph = pgv.AGraph(strict=True, directed=True, rankdir="TB")
 
-    colors = {
-        "default": "#D3D3D3",  # Grey for unavailable
-        "completed": "#90EE90",  # Light green
-        "next": "#FFD700",       # Gold
-        "unmet": "red",          # Red for unmet prerequisites
-        "prerequisite": "black",  # Black for normal prerequisites
-    }
+    completed_mask = course_graph.mask_of(completed_courses)
+    completed = flags_of(completed_mask, len(course_graph))
+    satisfied = flags_of(course_graph.satisfied_mask(completed_mask), len(course_graph))
+    next_courses = course_graph.next_flags(completed, satisfied)
+    ids = course_graph.ids
+    if labels is None:
+        labels = CourseLabels(course_graph.names)
+
+    if nodes is None:
+        drawn = None
+        course_nodes = range(course_graph.course_count)
+    else:
+        drawn = flags_of(nodes, len(course_graph))
+        course_nodes = [node for node in range(course_graph.course_count) if drawn[node]]
 
     # Add nodes
-    for course_id, details in filtered_course_data.items():
-        raw_label = details["name"]
-        wrapped_label = wrap_text(raw_label, max_width=15)
-        prerequisites = details["prerequisites"]
+    for node in course_nodes:
+        course_id = ids[node]
+        wrapped_label = labels.html[node]
 
-        if course_id in completed_courses:
-            fillcolor = colors["completed"] # Completed courses
-        elif all(prereq in completed_courses for prereq in prerequisites):
-            fillcolor = colors["next"]  # Courses that can now be taken
+        if completed[node]:
+            fillcolor = COLORS["completed"] # Completed courses
+        elif next_courses[node]:
+            fillcolor = COLORS["next"]  # Courses that can now be taken
         else:
-            fillcolor = colors["default"]  # Unavailable courses
+            fillcolor = COLORS["default"]  # Unavailable courses
 
         graph.add_node(
             course_id,
@@ -127,28 +170,208 @@ def generate_circular_graph(
         )
 
         # Add edges for prerequisites
-        for prereq in prerequisites:
-            edge_color = (
-                colors["prerequisite"] if prereq in completed_courses else colors["unmet"]
-            )
-            graph.add_edge(prereq, course_id, color=edge_color)
+        for prereq in course_graph.prerequisites(node):
+            if drawn is not None and not drawn[prereq]:
+                continue
+            if completed[prereq]:
+                edge_color = COLORS["prerequisite"]
+            elif satisfied[prereq]:
+                continue  # An overlapping course was completed instead
+            else:
+                edge_color = COLORS["unmet"]
+            graph.add_edge(ids[prereq], course_id, color=edge_color)
+
+    return graph
+
+def generate_circular_graph(
+    course_data, completed_courses, overlapping_groups, output_file="updated_course_dependencies.png"
+    ,format="png", layout=None, course_graph=None, labels=None
+):
+    """
+    Generate a course dependency graph with perfect circles, dynamic label wrapping,
+    marking completed courses, and highlighting unmet prerequisites for unavailable courses.
+    If a precomputed layout is given, the graph is only restyled and drawn, skipping dot.
+    """
+    # Index the data once unless the caller already holds a CourseGraph
+    if course_graph is None:
+        course_graph = CourseGraph(course_data, as_overlap_index(overlapping_groups))
+
+    # Create graph
+    with stage("graph"):
+        graph = build_course_graph(course_graph, completed_courses, labels=labels)
 
     # Apply layout and save
-    graph.layout(prog="dot")
-    graph.draw(output_file, format=format)  # Save with high resolution
+    if layout is not None and apply_layout(graph, layout):
+        with stage("draw"):
+            draw_with_layout(graph, output_file, format=format)
+    else:
+        with stage("layout"):
+            layout_graph(graph)
+        with stage("draw"):
+            graph.draw(output_file, format=format)  # Save with high resolution
     print(f"Graph saved to {output_file}")
 
-def generate_graphv2(completed_courses, output_file: object ="course_dependencies.png", format="png"):
-    # Load the JSON files
-    course_file = "course_dependencies_with_names.json"
-    overlap_file = "final_overlapping_groups.json"
+def get_layout(catalog):
+    """
+    Return the layout of the unfiltered catalog, computing it once per data version.
+    """
+    return layout_cache.get(catalog.version, lambda: build_course_graph(catalog.graph, [], labels=catalog.labels))
+
+def generate_graphv2(completed_courses, output_file: object ="course_dependencies.png", format="png",
+                     catalog=None, focus=None):
+    # Use the shared in-process catalog instead of re-reading the JSON files
+    if catalog is None:
+        catalog = get_catalog()
+
+    # A focused view is small, so it is laid out on its own rather than cut from the full layout
+    if focus is not None:
+        graph = positioned_graph(completed_courses, catalog, focus)
+        with stage("draw"):
+            draw_with_layout(graph, output_file, format=format)
+        return
 
-    course_data = load_data(course_file)
-    overlapping_groups = load_data(overlap_file)
+    # Lay out the unfiltered catalog once per data version and reuse it for every request
+    with stage("layout"):
+        layout = get_layout(catalog)
 
     # Generate the graph
-    generate_circular_graph(course_data, completed_courses, overlapping_groups, output_file, format)
-    
+    generate_circular_graph(
+        catalog.courses, completed_courses, catalog.overlap_index, output_file, format, layout,
+        course_graph=catalog.graph, labels=catalog.labels,
+    )
+
+def positioned_graph(completed_courses, catalog=None, focus=None, timeout=None):
+    """
+    Build the colored graph for a completed set with the cached layout applied.
+    A FocusView graph holds only the courses of the view and gets its own layout,
+    run by dot in a process that is killed after timeout seconds.
+    """
+    if catalog is None:
+        catalog = get_catalog()
+
+    if focus is not None:
+        with stage("focus"):
+            nodes = focus_mask(catalog, completed_courses, focus)
+        with stage("graph"):
+            graph = build_course_graph(catalog.graph, completed_courses, nodes, catalog.labels)
+        with stage("layout"):
+            layout_graph(graph, timeout=timeout)
+        return graph
+
+    with stage("graph"):
+        graph = build_course_graph(catalog.graph, completed_courses, labels=catalog.labels)
+    with stage("layout"):
+        if not apply_layout(graph, get_layout(catalog)):
+            layout_graph(graph, timeout=timeout)
+    return graph
+
+def stream_graphv2(completed_courses, format="svg", catalog=None, focus=None):
+    """
+    Like generate_graphv2, but yield the image in chunks as Graphviz writes it.
+    """
+    return stream_with_layout(positioned_graph(completed_courses, catalog, focus), format=format)
+
+def render_graphv2(completed_courses, format="png", timeout=None, catalog=None, focus=None, version=None):
+    """
+    Like generate_graphv2, but return the image bytes, giving up after timeout seconds.
+    Module-level so it can run in a render process pool. With a version and no
+    catalog, the process's catalog is brought to that version first, so the image
+    matches the version the caller caches it under (see CatalogStore.ensure_version).
+    """
+    if catalog is None and version is not None:
+        catalog = get_catalog(version)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    graph = positioned_graph(completed_courses, catalog, focus, timeout)
+    # Laying out and drawing share the one timeout
+    remaining = None if deadline is None else max(deadline - time.monotonic(), 0.001)
+    with stage("draw"):
+        return render_with_layout(graph, format, remaining)
+
+def warm_up(catalog=None):
+    """
+    Load the catalog and compute its layout ahead of the first request.
+    """
+    get_layout(catalog or get_catalog())
+
+def layout_payload(catalog):
+    """
+    Describe the cached layout for client-side rendering: node and edge geometry in
+    SVG coordinates, labels, and the overlap groups needed to recolor in the browser.
+    Built once per data version.
+    """
+    cached = _payload_cache.get(catalog.version)
+    if cached is not None:
+        return cached
+
+    layout = get_layout(catalog)
+    course_graph = catalog.graph
+    width, height = layout_bounds(layout)
+    top = float(layout["bb"].split(",")[3])
+
+    nodes = []
+    node_index = {}
+    for node, course_id in enumerate(course_graph.ids):
+        geometry = layout["nodes"].get(course_id)
+        if geometry is None:
+            continue
+        node_index[node] = len(nodes)
+        x, y, rx, ry = svg_node_geometry(geometry, top)
+        is_course = node < course_graph.course_count
+        label = list(catalog.labels.lines[node]) if is_course else [course_id]
+        nodes.append({
+            "id": course_id,
+            "label": label,
+            "course": is_course,
+            "x": x, "y": y, "rx": rx, "ry": ry,
+        })
+
+    edges = []
+    for node in range(course_graph.course_count):
+        for prereq in course_graph.prerequisites(node):
+            pos = layout["edges"].get((course_graph.ids[prereq], course_graph.ids[node]))
+            if pos is None:
+                continue
+            path, arrow = svg_edge_geometry(pos, top)
+            edges.append([node_index[prereq], node_index[node], path, arrow])
+
+    overlap_index = catalog.overlap_index
+    groups = overlap_index.classes if overlap_index.transitive else overlap_index.groups
+    overlap = []
+    for group in groups:
+        members = [node_index[course_graph.index[c]] for c in group if course_graph.index[c] in node_index]
+        if len(members) > 1:
+            overlap.append(members)
+
+    payload = {
+        "version": catalog.version,
+        "width": width,
+        "height": height,
+        "colors": COLORS,
+        "nodes": nodes,
+        "edges": edges,
+        "overlap": overlap,
+    }
+    _payload_cache.clear()
+    _payload_cache[catalog.version] = payload
+    return payload
+
+def layout_status(catalog, completed_courses):
+    """
+    Per-node and per-edge status for a completed set, aligned with layout_payload.
+    """
+    payload = layout_payload(catalog)
+    course_graph = catalog.graph
+    completed_mask = course_graph.mask_of(completed_courses)
+    satisfied = course_graph.satisfied_mask(completed_mask)
+    statuses = course_graph.node_statuses(completed_mask, satisfied)
+    node_ids = [course_graph.index[node["id"]] for node in payload["nodes"]]
+    return {
+        "nodes": [statuses[node] for node in node_ids],
+        "edges": [
+            course_graph.edge_status(node_ids[source], completed_mask, satisfied)
+            for source, _, _, _ in payload["edges"]
+        ],
+    }
 
 def main():
     completed_courses = [
@@ -0,0 +1,121 @@
+import argparse
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+from batch_eligibility import read_students_jsonl
+from course_catalog import get_catalog
+from graph_core import prefix_sets
+from graph_output import FORMATS, SVGZ, encode_stream, encodings_for
+from render_cache import RenderCache, cache_key, render_variant
+from use3party_withoverlap import generate_graphv2, warm_up
+
+DEFAULT_FORMATS = ("svg", "png")
+# Most sets enumerated by --max-size; the count grows quickly with the size
+DEFAULT_LIMIT = 10000
+
+
+def read_popular_sets(lines):
+    """
+    Yield completed-course sets from JSON lines, one set per line, in any form
+    POST /batch_eligibility accepts. Unreadable lines are skipped.
+    """
+    for _, courses in read_students_jsonl(lines):
+        if courses is not None:
+            yield courses
+
+
+def render_set(completed_courses, format, version):
+    """
+    Render one completed set with generate_graphv2 and return the image bytes.
+    The worker renders the catalog version the keys were computed from, or fails.
+    """
+    img_data = BytesIO()
+    generate_graphv2(completed_courses, img_data, format=format, catalog=get_catalog(version))
+    return img_data.getvalue()
+
+
+def warm_cache(course_sets, formats, cache, workers=None, force=False):
+    """
+    Render every course set in every format across a process pool and write each
+    render, in every encoding the server may send it with, to the cache's disk tier
+    under the key the server looks it up by. Sets whose files already exist are
+    skipped unless force is set. Returns (rendered, skipped, failed) counts.
+    """
+    catalog = get_catalog()
+    jobs = {}
+    skipped = 0
+    for completed_courses in course_sets:
+        canonical = tuple(sorted(set(completed_courses)))
+        for format in formats:
+            if (canonical, format) in jobs:
+                continue
+            keys = {
+                encoding: cache_key(canonical, render_variant(format, encoding), catalog.version)
+                for encoding in encodings_for(format)
+            }
+            if not force and all(cache.on_disk(key) for key in keys.values()):
+                skipped += 1
+                continue
+            jobs[canonical, format] = keys
+
+    rendered = failed = 0
+    # Spawned workers each load the catalog and its layout once, as the render pool does
+    with ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context("spawn"), initializer=warm_up
+    ) as executor:
+        futures = {
+            executor.submit(render_set, list(canonical), format, catalog.version): keys
+            for (canonical, format), keys in jobs.items()
+        }
+        for future in as_completed(futures):
+            try:
+                img = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Render failed: {e}", file=sys.stderr)
+                continue
+            for encoding, key in futures[future].items():
+                cache.write_disk(key, b"".join(encode_stream([img], encoding)))
+            rendered += 1
+    return rendered, skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-render graphs for common completed-course sets into the render cache directory."
+    )
+    parser.add_argument("--sets", help="JSON lines file of popular completed-course sets")
+    parser.add_argument("--max-size", type=int,
+                        help="also render every reachable completed set of up to this many courses")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT,
+                        help="most sets to enumerate with --max-size")
+    parser.add_argument("--formats", nargs="+", default=list(DEFAULT_FORMATS), choices=[*FORMATS, SVGZ])
+    parser.add_argument("--cache-dir", default=os.environ.get("RENDER_CACHE_DIR"),
+                        help="render cache directory (default: $RENDER_CACHE_DIR)")
+    parser.add_argument("--workers", type=int, help="render processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-render sets that are already cached")
+    args = parser.parse_args()
+
+    if not args.cache_dir:
+        parser.error("set --cache-dir or RENDER_CACHE_DIR")
+    if args.sets is None and args.max_size is None:
+        parser.error("give --sets, --max-size or both")
+
+    course_sets = []
+    if args.sets:
+        with open(args.sets, "r", encoding="utf-8-sig") as f:
+            course_sets.extend(read_popular_sets(f))
+    if args.max_size is not None:
+        course_sets.extend(prefix_sets(get_catalog().graph, args.max_size, args.limit))
+
+    cache = RenderCache(disk_dir=args.cache_dir)
+    rendered, skipped, failed = warm_cache(course_sets, args.formats, cache, args.workers, args.force)
+    print(f"{rendered} rendered, {skipped} already cached, {failed} failed, in {args.cache_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())